@@ -0,0 +1,313 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import zuweisung_ladetyp
+
+# ======================================================
+# Benchmark-Suite: synthetische, skalierte LKW-Mengen je Stufe
+# ======================================================
+
+STUFEN = ['zuweisung', 'konfiguration_ladehub', 'laden_nicht_laden', 'epex_optimierung']
+SZENARIO = 'cl_{cluster}_quote_100-100-100_netz_100_pow_100-100-100_pause_45-540_M_1_Base'
+
+
+def benchmark_pfad():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'benchmark')
+
+
+# ======================================================
+# Synthetische Daten
+# ======================================================
+def synthetische_lkws(faktor, cluster=2, tage=7, seed=42):
+    """
+    Erzeugt eine LKW-Menge nach den Verteilungen aus ladevorgaenge_daily_cluster.csv
+    und verteilungsfunktion_mcs-ncs.csv. Die Tagesanzahlen des Clusters werden mit
+    faktor skaliert (z.B. 1, 5, 20). Die Ladesäule wird noch nicht zugewiesen.
+    """
+    config = zuweisung_ladetyp.load_configurations()
+    df_verteilungsfunktion, df_ladevorgaenge_daily = zuweisung_ladetyp.load_input_data(config['path'])
+    rng = np.random.default_rng(seed)
+
+    kapazitaeten = np.array([int(k) for k in config['kapazitaeten_lkws']])
+    p_kapazitaeten = np.array(list(config['kapazitaeten_lkws'].values()))
+    p_kapazitaeten = p_kapazitaeten / p_kapazitaeten.sum()
+
+    list_df = []
+    for day in range(tage):
+        for pausentyp in config['pausentypen']:
+            anzahl = df_ladevorgaenge_daily[
+                (df_ladevorgaenge_daily['Cluster'] == cluster) &
+                (df_ladevorgaenge_daily['Wochentag'] == day % 7 + 1) &
+                (df_ladevorgaenge_daily['Ladetype'] == pausentyp)
+            ]['Anzahl'].values[0]
+            n = int(round(anzahl * faktor))
+            if n == 0:
+                continue
+
+            p_zeit = df_verteilungsfunktion[pausentyp].to_numpy()
+            minuten = rng.choice(df_verteilungsfunktion['Zeit'].to_numpy(), size=n, p=p_zeit / p_zeit.sum())
+
+            # Vektorisierte Variante von zuweisung_ladetyp.get_soc
+            soc = np.where(minuten < 360, 0.2, -(0.00028) * minuten + 0.6) + rng.uniform(-0.1, 0.1, size=n)
+
+            list_df.append(pd.DataFrame({
+                'Cluster': cluster,
+                'Wochentag': day + 1,
+                'Ankunftszeit': minuten,
+                'Pausentyp': pausentyp,
+                'Kapazitaet': rng.choice(kapazitaeten, size=n, p=p_kapazitaeten),
+                'Max_Leistung': config['max_leistung_lkw'],
+                'SOC': soc,
+                'Pausenlaenge': config['pausenzeiten_lkws'][pausentyp],
+            }))
+
+    df_lkws = pd.concat(list_df)
+    df_lkws.sort_values(by=['Wochentag', 'Ankunftszeit'], inplace=True)
+    df_lkws.reset_index(drop=True, inplace=True)
+    df_lkws['Nummer'] = df_lkws.index + 1
+    df_lkws['Ankunftszeit_total'] = df_lkws['Ankunftszeit'] + (df_lkws['Wochentag'] - 1) * 1440
+    return df_lkws, config
+
+
+def epex_preise():
+    """
+    Liefert EPEX-Preise im 5-Minuten-Raster. Nutzt input/epex_week.csv, falls vorhanden,
+    sonst werden die Stundenwerte aus epex.csv linear interpoliert (wie im Notebook).
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'input')
+    if os.path.exists(os.path.join(path, 'epex_week.csv')):
+        df_epex = pd.read_csv(os.path.join(path, 'epex_week.csv'), sep=';', decimal=',', index_col=0)
+        return df_epex['Preis'].tolist()
+
+    preis_15min = pd.read_csv(os.path.join(path, 'datenaufbereitung_epex', 'epex.csv'))['Preis'].to_numpy()
+    preis_stunde = preis_15min[::4]
+    stuetzstellen = np.arange(len(preis_stunde)) * 12
+    return np.interp(np.arange(stuetzstellen[-1] + 1), stuetzstellen, preis_stunde).tolist()
+
+
+# ======================================================
+# Messung
+# ======================================================
+def rss_max_mb():
+    """
+    Maximaler RSS des Prozesses in MB. ru_maxrss ist unter Linux in KiB,
+    unter macOS in Byte angegeben.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss / 1024**2
+    return rss / 1024
+
+
+def messen(funktion, *args, tracemalloc_lauf=False, **kwargs):
+    """
+    Führt funktion aus und misst Laufzeit sowie den Anstieg des maximalen RSS.
+    Mit tracemalloc_lauf=True folgt ein zweiter Lauf mit tracemalloc für die
+    Python-Speicherspitze; tracemalloc verlangsamt allokationsintensive Stufen
+    stark und läuft daher nie während der Zeitmessung. Zurückgegeben wird das
+    Ergebnis des ersten Laufs. Fehler der Stufe in einem der Läufe (z.B.
+    Solver-Lizenzgrenzen) werden als Status 'fehler' protokolliert.
+    """
+    try:
+        rss_vorher = rss_max_mb()
+        start = time.perf_counter()
+        ergebnis = funktion(*args, **kwargs)
+        laufzeit = time.perf_counter() - start
+        rss_nachher = rss_max_mb()
+
+        messung = {
+            'status': 'ok',
+            'laufzeit_s': laufzeit,
+            'rss_anstieg_mb': rss_nachher - rss_vorher,
+        }
+
+        if tracemalloc_lauf:
+            tracemalloc.start()
+            try:
+                funktion(*args, **kwargs)
+                _, speicher_spitze = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            messung['speicher_spitze_mb'] = speicher_spitze / 1024**2
+    except Exception as e:
+        return None, {'status': 'fehler', 'grund': f'{type(e).__name__}: {e}'}
+
+    return ergebnis, messung
+
+
+def stufe_importieren(name):
+    try:
+        return importlib.import_module(name), None
+    except ImportError as e:
+        return None, {'status': 'übersprungen', 'grund': str(e)}
+
+
+def benchmark_faktor(faktor, stufen, cluster=2, tage=7, seed=42, tracemalloc_lauf=False):
+    """
+    Führt alle gewählten Stufen für eine skalierte LKW-Menge aus.
+    Rückgabe: Liste mit einem Eintrag je Stufe.
+    """
+    df_lkws, config = synthetische_lkws(faktor, cluster, tage, seed)
+    szenario = SZENARIO.format(cluster=cluster)
+    ergebnisse = []
+    df_anzahl_ladesaeulen = None
+    df_loadstatus = None
+
+    def eintrag(stufe, messung, **extra):
+        messung.update({'stufe': stufe, 'faktor': faktor, 'anzahl_lkws': len(df_lkws)}, **extra)
+        print(f"[{stufe}] Faktor={faktor}, LKW={len(df_lkws)}: {messung}")
+        ergebnisse.append(messung)
+
+    # Zuweisung Ladetyp
+    df_lkws, messung = messen(zuweisung_ladetyp.assign_charging_stations, df_lkws, config, tracemalloc_lauf=tracemalloc_lauf)
+    if 'zuweisung' in stufen:
+        eintrag('zuweisung', messung)
+
+    # Konfiguration Ladehub (Max-Flow-Min-Cost)
+    if {'konfiguration_ladehub', 'laden_nicht_laden', 'epex_optimierung'} & set(stufen):
+        modul, fehler = stufe_importieren('konfiguration_ladehub')
+        if fehler:
+            eintrag('konfiguration_ladehub', fehler)
+        else:
+            ergebnis, messung = messen(modul.konfiguration_ladehub, df_lkws, szenario, speichern=False, tracemalloc_lauf=tracemalloc_lauf)
+            if ergebnis is not None:
+                df_anzahl_ladesaeulen, df_loadstatus = ergebnis
+            if 'konfiguration_ladehub' in stufen:
+                eintrag('konfiguration_ladehub', messung)
+
+    # Laden/Nicht-Laden (Gurobi-Zuordnung)
+    if 'laden_nicht_laden' in stufen:
+        modul, fehler = stufe_importieren('laden_nicht_laden')
+        if fehler or df_anzahl_ladesaeulen is None:
+            eintrag('laden_nicht_laden', fehler or {'status': 'übersprungen', 'grund': 'keine Ladehub-Konfiguration'})
+        else:
+            def laden_nicht_laden_alle():
+                for ladetyp in ['HPC', 'MCS', 'NCS']:
+                    df_typ = df_lkws[df_lkws['Ladesäule'] == ladetyp]
+                    if len(df_typ) == 0:
+                        continue
+                    modul.max_truck_assignment(
+                        df_typ['Ankunftszeit_total'].tolist(),
+                        (df_typ['Ankunftszeit_total'] + df_typ['Pausenlaenge']).tolist(),
+                        int(df_anzahl_ladesaeulen.loc[0, ladetyp])
+                    )
+            _, messung = messen(laden_nicht_laden_alle, tracemalloc_lauf=tracemalloc_lauf)
+            eintrag('laden_nicht_laden', messung)
+
+    # EPEX-Optimierung (erste Woche, Strategie 'epex') wie in modellierung_epex:
+    # dekomponiert, parallel und mit Begrenzung der Ladesäulen
+    if 'epex_optimierung' in stufen:
+        modul, fehler = stufe_importieren('epex_optimierung')
+        if fehler or df_loadstatus is None:
+            eintrag('epex_optimierung', fehler or {'status': 'übersprungen', 'grund': 'keine Ladehub-Konfiguration'})
+        else:
+            df_lkw = df_loadstatus.sort_values(by=['Ankunftszeit_total']).reset_index(drop=True)
+            cluster, bidirektional, ladeleistung, max_saeulen, netzanschluss = modul.szenario_parameter(
+                szenario, df_anzahl_ladesaeulen
+            )
+            preise = epex_preise()
+
+            def epex_woche():
+                df_woche = modul.lkw_woche(df_lkw, 0)
+                with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    return modul.optimierung_woche_dekomponiert(
+                        df_woche, preise, ladeleistung, netzanschluss, 'epex', bidirektional,
+                        modul.neues_lastgang_dict(), executor, max_saeulen
+                    )
+            kosten, messung = messen(epex_woche, tracemalloc_lauf=tracemalloc_lauf)
+            eintrag('epex_optimierung', messung, kosten=kosten)
+
+    return ergebnisse
+
+
+# ======================================================
+# Baseline speichern und vergleichen
+# ======================================================
+def speichere_ergebnisse(ergebnisse, name, meta):
+    path = benchmark_pfad()
+    os.makedirs(path, exist_ok=True)
+    datei = os.path.join(path, f'benchmark_{name}.json')
+    with open(datei, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'ergebnisse': ergebnisse}, f, indent=2, ensure_ascii=False)
+    print(f"Ergebnisse gespeichert: {datei}")
+    return datei
+
+
+def vergleiche(ergebnisse, datei_baseline, toleranz=1.2):
+    """
+    Vergleicht Laufzeit und Speicherspitze je (Stufe, Faktor) mit einer gespeicherten
+    Baseline. Rückgabe: DataFrame mit Verhältnissen; Regressionen über toleranz
+    werden markiert.
+    """
+    with open(datei_baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['ergebnisse']
+
+    df_neu = pd.DataFrame([e for e in ergebnisse if e['status'] == 'ok'])
+    df_alt = pd.DataFrame([e for e in baseline if e['status'] == 'ok'])
+    if df_neu.empty or df_alt.empty:
+        print("Keine vergleichbaren Messungen vorhanden.")
+        return pd.DataFrame()
+
+    df_vergleich = df_neu.merge(df_alt, on=['stufe', 'faktor'], suffixes=('', '_baseline'))
+    df_vergleich['verhaeltnis_laufzeit'] = df_vergleich['laufzeit_s'] / df_vergleich['laufzeit_s_baseline']
+    # Python-Speicherspitze, wenn beide Läufe mit --tracemalloc gemessen wurden, sonst RSS-Anstieg
+    speicher = 'speicher_spitze_mb' if {'speicher_spitze_mb', 'speicher_spitze_mb_baseline'} <= set(df_vergleich.columns) else 'rss_anstieg_mb'
+    df_vergleich['verhaeltnis_speicher'] = df_vergleich[speicher] / df_vergleich[f'{speicher}_baseline'].replace(0, np.nan)
+    df_vergleich['regression'] = (
+        (df_vergleich['verhaeltnis_laufzeit'] > toleranz) |
+        (df_vergleich['verhaeltnis_speicher'] > toleranz)
+    )
+    df_vergleich = df_vergleich[[
+        'stufe', 'faktor', 'laufzeit_s', 'laufzeit_s_baseline', 'verhaeltnis_laufzeit',
+        speicher, f'{speicher}_baseline', 'verhaeltnis_speicher', 'regression'
+    ]]
+    print(df_vergleich.to_string(index=False))
+    return df_vergleich
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark der Pipeline-Stufen mit skalierten synthetischen LKW-Mengen.')
+    parser.add_argument('--faktoren', type=float, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--stufen', nargs='+', choices=STUFEN, default=STUFEN)
+    parser.add_argument('--cluster', type=int, default=2)
+    parser.add_argument('--tage', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--name', default='baseline', help='Name der Ergebnisdatei data/benchmark/benchmark_<name>.json')
+    parser.add_argument('--vergleich', help='Baseline-Datei, gegen die verglichen wird')
+    parser.add_argument('--toleranz', type=float, default=1.2)
+    parser.add_argument('--tracemalloc', action='store_true', help='Zusätzlicher Lauf je Stufe für die Python-Speicherspitze')
+    args = parser.parse_args(argv)
+
+    ergebnisse = []
+    for faktor in args.faktoren:
+        ergebnisse += benchmark_faktor(faktor, args.stufen, args.cluster, args.tage, args.seed, args.tracemalloc)
+
+    meta = {
+        'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plattform': platform.platform(),
+        'cluster': args.cluster,
+        'tage': args.tage,
+        'seed': args.seed,
+        'tracemalloc': args.tracemalloc,
+    }
+    speichere_ergebnisse(ergebnisse, args.name, meta)
+
+    if args.vergleich:
+        vergleiche(ergebnisse, args.vergleich, args.toleranz)
+
+
+if __name__ == '__main__':
+    main()
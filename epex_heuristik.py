@@ -0,0 +1,197 @@
+import heapq
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import config
+import epex_optimierung
+import ladekurve
+
+# ======================================================
+# Heuristischer Lade-Dispatcher (Alternative zum MIP)
+# ======================================================
+
+def fahrplan_lkw(e_req, p_saeule, netz_rest, preis, soc_a, kapazitaet, strategie):
+    """
+    Fahrplan eines LKW in seinem Zeitfenster: 'epex' belegt die günstigsten
+    Zeitschritte zuerst, 'Tmin' die frühesten. Die Leistung ist je Zeitschritt
+    durch Säulenleistung, freie Netzkapazität und die SOC-abhängige Ladekurve
+    (ladekurve) begrenzt. Verletzt ein Zeitschritt die Ladekurve, wird seine
+    Obergrenze abgesenkt und neu verteilt.
+    Rückgabe: Leistung je Zeitschritt des Fensters.
+    """
+    Delta_t = 5 / 60.0
+    n = len(preis)
+    if strategie == 'epex':
+        reihenfolge = np.argsort(preis, kind='stable')
+    elif strategie == 'Tmin':
+        reihenfolge = np.arange(n)
+    else:
+        raise ValueError(f"Strategie {strategie} nicht bekannt.")
+
+    obergrenze = np.minimum(p_saeule, np.maximum(netz_rest, 0))
+    while True:
+        # Zeitschritte in Reihenfolge bis zur jeweiligen Obergrenze füllen
+        grenze = obergrenze[reihenfolge]
+        bereits = np.cumsum(grenze) - grenze
+        leistung = np.zeros(n)
+        leistung[reihenfolge] = np.clip(e_req / Delta_t - bereits, 0, grenze)
+
+        # Ladekurve am SOC zu Beginn jedes Zeitschritts prüfen
+        soc = soc_a + (np.cumsum(leistung) - leistung) * Delta_t / kapazitaet
+        p_kurve = ladekurve.max_leistung(soc)
+        verletzt = leistung > p_kurve + 1e-9
+        if not verletzt.any():
+            return leistung
+        obergrenze[verletzt] = p_kurve[verletzt]
+
+def dispatch_woche(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, dict_lkw_lastgang):
+    """
+    Heuristisches Gegenstück zu epex_optimierung.optimierung_woche. Die LKW werden
+    über eine Prioritätswarteschlange nach Spielraum (Energie im Zeitfenster minus
+    E_req) abgearbeitet; jeder LKW erhält einen Fahrplan unter der noch freien
+    Netzkapazität. Entladen (bidirektional) wird nicht berücksichtigt.
+    Rückgabe: Kosten der Woche in €.
+    """
+    Delta_t = 5 / 60.0
+    I = len(df_lkw_filtered)
+    if I == 0:
+        return 0.0
+
+    df_lkw_filtered = df_lkw_filtered.reset_index(drop=True)
+    t_in = df_lkw_filtered['t_a'].to_numpy()
+    t_out = df_lkw_filtered['t_d'].to_numpy()
+    soc_a = df_lkw_filtered['SOC'].to_numpy()
+    kapazitaet = df_lkw_filtered['Kapazitaet'].to_numpy()
+    e_req = np.maximum(df_lkw_filtered['E_req'].to_numpy(), 0)
+    p_saeule = np.array([ladeleistung[typ] for typ in df_lkw_filtered['Ladesäule']], dtype=float)
+
+    T_start = t_in.min()
+    netz_rest = np.full(t_out.max() - T_start + 1, float(netzanschluss))
+    preis = np.asarray(epex_price[T_start:t_out.max() + 1])
+
+    # Wenig Spielraum zuerst, bei Gleichstand frühere Ankunft
+    spielraum = (t_out - t_in + 1) * np.minimum(p_saeule, max(ladekurve.YVALS)) * Delta_t - e_req
+    warteschlange = [(spielraum[i], t_in[i], i) for i in range(I)]
+    heapq.heapify(warteschlange)
+
+    leistungen = [None] * I
+    nicht_erreicht = 0
+    while warteschlange:
+        _, _, i = heapq.heappop(warteschlange)
+        fenster = slice(t_in[i] - T_start, t_out[i] - T_start + 1)
+        leistung = fahrplan_lkw(e_req[i], p_saeule[i], netz_rest[fenster], preis[fenster], soc_a[i], kapazitaet[i], strategie)
+        netz_rest[fenster] -= leistung
+        leistungen[i] = leistung
+        if leistung.sum() * Delta_t < e_req[i] - 1e-6:
+            nicht_erreicht += 1
+
+    if nicht_erreicht > 0:
+        print(f"E_req nicht erreicht für {nicht_erreicht} LKW.")
+
+    return epex_optimierung.greedy_ergebnisse(df_lkw_filtered, leistungen, epex_price, dict_lkw_lastgang)
+
+def modellierung_heuristik(szenario, strategie):
+    """
+    Wie epex_optimierung.modellierung_epex, aber mit dem heuristischen Dispatcher.
+    Liefert df_lkw_lastgang und df_lastgang im gleichen Schema.
+    """
+    df_epex, df_lkw, df_ladehub = epex_optimierung.datenimport(szenario)
+    cluster, bidirektional, ladeleistung, max_saeulen, netzanschluss = epex_optimierung.szenario_parameter(szenario, df_ladehub)
+    epex_price = df_epex['Preis'].tolist()
+
+    dict_lkw_lastgang = epex_optimierung.neues_lastgang_dict()
+    total_cost = 0
+    for week in range(52):
+        df_lkw_filtered = epex_optimierung.lkw_woche(df_lkw, week)
+        total_cost += dispatch_woche(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, dict_lkw_lastgang)
+
+    df_lkw_lastgang = pd.DataFrame(dict_lkw_lastgang)
+    df_lkw_lastgang.sort_values(by=['LKW_ID', 'Zeit'], inplace=True)
+    df_lastgang = epex_optimierung.lastgang_hub(df_epex, df_lkw_lastgang)
+
+    print(f"Total cost: {total_cost} € für Strategie {strategie} (Heuristik)")
+
+    return df_lkw_lastgang, df_lastgang
+
+# ======================================================
+# Vergleich mit dem MIP
+# ======================================================
+
+def zielwert(dict_lkw_lastgang, strategie):
+    """
+    Zielfunktionswert eines Ergebnisses: Kosten in € ('epex') bzw.
+    Summe aus Zeitschritt mal Leistung ('Tmin').
+    """
+    df = pd.DataFrame(dict_lkw_lastgang).dropna(subset=['Leistung'])
+    leistung = df['Leistung'].astype(float)
+    if strategie == 'epex':
+        return (leistung * 5 / 60 * df['Preis']).sum()
+    return (df['Zeit'] // 5 * leistung).sum()
+
+def optimalitaetsluecke(szenario, strategie, anzahl_wochen=5, seed=42):
+    """
+    Löst zufällig gewählte Wochen mit Heuristik und MIP und berichtet die
+    relative Lücke des Zielfunktionswerts sowie die Laufzeiten.
+    """
+    df_epex, df_lkw, df_ladehub = epex_optimierung.datenimport(szenario)
+    cluster, bidirektional, ladeleistung, max_saeulen, netzanschluss = epex_optimierung.szenario_parameter(szenario, df_ladehub)
+    epex_price = df_epex['Preis'].tolist()
+
+    wochen = np.sort(np.random.default_rng(seed).choice(52, size=anzahl_wochen, replace=False))
+    zeilen = []
+    for week in wochen:
+        df_lkw_filtered = epex_optimierung.lkw_woche(df_lkw, week)
+
+        start = time.time()
+        dict_heuristik = epex_optimierung.neues_lastgang_dict()
+        dispatch_woche(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, dict_heuristik)
+        laufzeit_heuristik = time.time() - start
+
+        start = time.time()
+        dict_mip = epex_optimierung.neues_lastgang_dict()
+        cost_mip = epex_optimierung.optimierung_woche_dekomponiert(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, bidirektional, dict_mip)
+        laufzeit_mip = time.time() - start
+
+        ziel_heuristik = zielwert(dict_heuristik, strategie)
+        ziel_mip = zielwert(dict_mip, strategie) if cost_mip is not None else np.nan
+        zeilen.append({
+            'Woche': week + 1,
+            'Ziel_Heuristik': ziel_heuristik,
+            'Ziel_MIP': ziel_mip,
+            'Luecke': (ziel_heuristik - ziel_mip) / abs(ziel_mip) if ziel_mip else np.nan,
+            'Laufzeit_Heuristik': laufzeit_heuristik,
+            'Laufzeit_MIP': laufzeit_mip,
+        })
+
+    df_luecke = pd.DataFrame(zeilen)
+    print(df_luecke.to_string(index=False))
+    return df_luecke
+
+def main():
+    df_lkw_lastgang_main = pd.DataFrame()
+    df_lastgang_main = pd.DataFrame()
+
+    strategies = ['epex', 'Tmin']
+
+    for szenario in config.list_szenarien:
+        for strategie in strategies:
+            print(f"Heuristik EPEX: {szenario}")
+            df_lkw_lastgang, df_lastgang = modellierung_heuristik(szenario, strategie)
+            df_lkw_lastgang['Strategie'] = strategie
+            df_lastgang['Strategie'] = strategie
+            df_lkw_lastgang_main = pd.concat([df_lkw_lastgang_main, df_lkw_lastgang])
+            df_lastgang_main = pd.concat([df_lastgang_main, df_lastgang])
+
+        path = os.path.dirname(os.path.abspath(__file__))
+        df_lkw_lastgang_main.to_csv(os.path.join(path, 'data', 'lastgang_lkw_epex', f'lastgang_lkw_heuristik_{szenario}.csv'), sep=';', decimal=',', index=False)
+        df_lastgang_main.to_csv(os.path.join(path, 'data', 'lastgang_epex', f'lastgang_heuristik_{szenario}.csv'), sep=';', decimal=',', index=True)
+
+if __name__ == '__main__':
+    start = time.time()
+    main()
+    end = time.time()
+
+    print(f"Laufzeit: {end - start} Sekunden")
@@ -1,48 +1,25 @@
-from gurobipy import Model, GRB, quicksum
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import time
 import os
 import config
-
-start = time.time() 
+import lastgang_speicher
+import ladekurve
+import epex_presolve
 
 
 # ======================================================
 # 1) Einlesen oder Erzeugen der Basis-Daten
 # ======================================================
 
-def modellierung_epex(szenario, strategie):
+def szenario_parameter(szenario, df_ladehub):
+    """
+    Parst die Szenario-Bezeichnung und liefert Cluster, Bidirektionalität,
+    Ladeleistung je Ladesäulen-Typ, Anzahl Ladesäulen und Netzanschluss.
+    """
     cluster = int(szenario.split('_')[1])
     bidirektional = False if szenario.split('_')[10] == 'M' else True
-    path = os.path.dirname(os.path.abspath(__file__))
-    
-    df_epex = pd.read_csv(os.path.join(path, 'input', 'epex_week.csv'), sep=';', decimal=',', index_col=0)
-    
-    df_lastgang = df_epex.copy()
-    df_lastgang['Leistung'] = 0.0
-    df_lastgang['Zeit_Num'] = range(0, len(df_lastgang) * 5, 5)
-    
-    df_lastgang.drop(['Tag', 'Uhrzeit', 'Wochentag'], axis=1, inplace=True)
-    print(df_lastgang)
-    
-    df_lkw  = pd.read_csv(os.path.join(path, 'data', 'lkws', f'eingehende_lkws_loadstatus_{szenario}.csv'), sep=';', decimal=',', index_col=0)
-    df_lkw.sort_values(by=['Ankunftszeit_total'], inplace=True)
-    df_lkw.reset_index(drop=True, inplace=True)
-    
-    df_ladehub = pd.read_csv(os.path.join(path, 'data','konfiguration_ladehub',f'anzahl_ladesaeulen_{szenario}.csv'), sep=';', decimal=',')
-    
-    dict_lkw_lastgang = {
-        'LKW_ID': [],
-        'Ladetyp': [],
-        'Zeit': [],
-        'Ladezeit': [],
-        'Leistung': [],
-        'Pplus': [],
-        'Pminus': [],
-        'SOC': [],
-        'z': [],
-        'Preis': []
-    }
 
     # Maximale Leistung pro Ladesäulen-Typ
     ladeleistung = {
@@ -51,7 +28,6 @@ def modellierung_epex(szenario, strategie):
         'MCS': int(int(szenario.split('_')[7].split('-')[2])/100 * 1000)
     }
 
-
     # Verfügbare Anzahl Ladesäulen pro Typ
     max_saeulen = {
         'NCS': int(df_ladehub['NCS'][0]),
@@ -61,194 +37,562 @@ def modellierung_epex(szenario, strategie):
  
     netzanschlussfaktor = int(int(szenario.split('_')[5])/100)
     netzanschluss = (max_saeulen['NCS'] * ladeleistung['NCS'] + max_saeulen['HPC'] * ladeleistung['HPC'] + max_saeulen['MCS'] * ladeleistung['MCS']) * netzanschlussfaktor
+
+    return cluster, bidirektional, ladeleistung, max_saeulen, netzanschluss
+
+def neues_lastgang_dict():
+    return {
+        'LKW_ID': [],
+        'Ladetyp': [],
+        'Zeit': [],
+        'Ladezeit': [],
+        'Leistung': [],
+        'Pplus': [],
+        'Pminus': [],
+        'SOC': [],
+        'z': [],
+        'Preis': []
+    }
+
+def lkw_woche(df_lkw, week):
+    """
+    Filtert die geladenen LKW einer Woche und ergänzt Zeitindizes (t_a, t_d),
+    Ziel-SOC (SOC_req) und Energiebedarf (E_req).
+    """
+    df_lkw_filtered = df_lkw[(df_lkw['LoadStatus'] == 1) & (df_lkw['Wochentag']>=1+week*7) & (df_lkw['Wochentag']<=7+week*7)][:].copy()
+    df_lkw_filtered['t_a'] = ((df_lkw_filtered['Ankunftszeit_total']) // 5).astype(int)
+    df_lkw_filtered['t_d'] = ((df_lkw_filtered['Ankunftszeit_total'] + df_lkw_filtered['Pausenlaenge'] - 5) // 5).astype(int)
+    
+    SOC_req = []
+    for index, row in df_lkw_filtered.iterrows():
+        if row['Ladesäule'] == 'NCS':
+            SOC_req.append(1)
+        else:
+            SOC_req.append(4.5 * 1.26 * 80 / row['Kapazitaet'] + 0.15)
+    df_lkw_filtered['SOC_req'] = SOC_req
+    df_lkw_filtered['E_req'] = df_lkw_filtered['Kapazitaet'] * (df_lkw_filtered['SOC_req'] - df_lkw_filtered['SOC'])
+    return df_lkw_filtered
+
+def zeitindex(t_in, t_out):
+    """
+    Zeit-Bucket-Index: Ordnet jedem Zeitschritt die LKW zu, die in ihm stehen
+    (t_in <= t <= t_out). Aufbau über sortierte (Zeitschritt, LKW)-Paare, also
+    proportional zur Zahl aktiver Paare statt Zeitschritte mal LKW.
+    Rückgabe: erster Zeitschritt T_start und Liste aktive, wobei aktive[k] die
+    LKW-Indizes zum Zeitschritt T_start + k enthält.
+    """
+    t_in = np.asarray(t_in)
+    t_out = np.asarray(t_out)
+    T_start = int(t_in.min())
+    laengen = t_out - t_in + 1
+    lkw = np.repeat(np.arange(len(t_in)), laengen)
+    versatz = np.arange(laengen.sum()) - np.repeat(np.cumsum(laengen) - laengen, laengen)
+    zeit = np.repeat(t_in - T_start, laengen) + versatz
+    reihenfolge = np.argsort(zeit, kind='stable')
+    grenzen = np.searchsorted(zeit[reihenfolge], np.arange(t_out.max() - T_start + 2))
+    return T_start, np.split(lkw[reihenfolge], grenzen[1:-1])
+
+def saeulen_ueberbelegung(df_lkw_filtered, max_saeulen, vorbelegung_saeulen=None):
+    """
+    Zählt je Ladetyp und Zeitschritt die stehenden LKW (jeder belegt über seine
+    ganze Standzeit eine Säule) zuzüglich der Vorbelegung und vergleicht mit
+    max_saeulen. Die Belegung hängt nicht von den Ladeleistungen ab, daher ist
+    dies eine reine Datenprüfung und keine Modellbedingung.
+    Rückgabe: Liste (Ladetyp, Zeitschritt, Anzahl) mit Anzahl > max_saeulen[typ].
+    """
+    if vorbelegung_saeulen is None:
+        vorbelegung_saeulen = {}
+    ueberbelegt = []
+    for typ in max_saeulen:
+        df_typ = df_lkw_filtered[df_lkw_filtered['Ladesäule'] == typ]
+        belegt = {t: n for (typ_fest, t), n in vorbelegung_saeulen.items() if typ_fest == typ}
+        if len(df_typ) == 0 and not belegt:
+            continue
+        t_in = np.append(df_typ['t_a'].to_numpy(dtype=np.int64), list(belegt)).astype(np.int64)
+        t_out = np.append(df_typ['t_d'].to_numpy(dtype=np.int64), list(belegt)).astype(np.int64)
+        anzahl = np.append(np.ones(len(df_typ), dtype=np.int64), list(belegt.values())).astype(np.int64)
+        start = t_in.min()
+        belegung = np.zeros(t_out.max() - start + 2, dtype=np.int64)
+        np.add.at(belegung, t_in - start, anzahl)
+        np.add.at(belegung, t_out - start + 1, -anzahl)
+        belegung = np.cumsum(belegung)[:-1]
+        for k in np.flatnonzero(belegung > max_saeulen[typ]):
+            ueberbelegt.append((typ, int(start + k), int(belegung[k])))
+    return ueberbelegt
+
+def saeulen_pruefen(df_lkw_filtered, max_saeulen, vorbelegung_saeulen=None):
+    """
+    Meldet zu viele gleichzeitige LKW eines Ladetyps. Rückgabe: True, wenn die
+    Säulenzahl überall reicht.
+    """
+    ueberbelegt = saeulen_ueberbelegung(df_lkw_filtered, max_saeulen, vorbelegung_saeulen)
+    for typ, t, anzahl in ueberbelegt[:5]:
+        print(f"Zu wenige {typ}-Ladesäulen: Zeitschritt {t} mit {anzahl} LKW bei {max_saeulen[typ]} Säulen.")
+    if len(ueberbelegt) > 5:
+        print(f"... insgesamt {len(ueberbelegt)} überbelegte Zeitschritte.")
+    return len(ueberbelegt) == 0
+
+def optimierung_woche(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, bidirektional, dict_lkw_lastgang, env=None, max_saeulen=None, vorbelegung=None):
+    """
+    Baut und löst das Gurobi-Modell für die LKW einer Woche. Die Ergebnisse
+    werden an dict_lkw_lastgang angehängt. Rückgabe: Kosten der Woche in €
+    (None, falls keine optimale Lösung gefunden wurde).
+    Bei parallelem Lösen braucht jeder Thread ein eigenes Gurobi-Env.
+    Mit max_saeulen wird vorab geprüft, dass die gleichzeitig stehenden LKW je
+    Typ die Anzahl Ladesäulen nicht überschreiten (sonst None).
+    vorbelegung (aus epex_presolve.vorbelegung) verringert Netzanschluss und
+    Ladesäulen um die Belegung der bereits fixierten LKW.
+    """
+    # gurobipy erst beim Modellaufbau laden, nicht schon beim Import des Moduls
+    from gurobipy import Model, GRB, quicksum
+
+    Delta_t = 5 / 60.0   # Zeitintervall in Stunden (5 Minuten)
+    
+    t_in = df_lkw_filtered['t_a'].tolist()
+    t_out = df_lkw_filtered['t_d'].tolist()
+    l = df_lkw_filtered['Ladesäule'].tolist()
+    SOC_A = df_lkw_filtered['SOC'].tolist()
+    kapazitaet = df_lkw_filtered['Kapazitaet'].tolist()
+    E_req = df_lkw_filtered['E_req'].tolist()
+    I = len(df_lkw_filtered)
+    if I == 0:
+        return 0.0
+    
+    # Zeitindizes sind absolut (5-Minuten-Schritte ab Jahresbeginn),
+    # daher umfasst der Zeithorizont die Standzeiten der LKW dieser Woche
+    T_start, aktive = zeitindex(t_in, t_out)
+    if vorbelegung is None:
+        vorbelegung = {'netz': {}, 'saeulen': {}}
+    # Jeder LKW belegt seine Säule über die ganze Standzeit: Die Säulenzahl
+    # ist damit durch die Daten festgelegt und braucht keine Variablen
+    if max_saeulen is not None and not saeulen_pruefen(df_lkw_filtered, max_saeulen, vorbelegung['saeulen']):
+        return None
+    
+    # Schranken der Ladekurve aus den Ladetabellen: Der erreichbare SOC liegt zwischen
+    # SOC_A (bzw. 0 bei Entladung) und dem SOC bei Laden mit maximaler Leistung.
+    # Fällt die Ladekurve in diesem Bereich nicht unter die Säulenleistung, entfällt
+    # sie; ist sie dort konstant, genügt eine feste Schranke statt einer PWL-Bedingung.
+    ladekurve_pwl = []
+    p_kurve_konstant = {}
+    for i in range(I):
+        tabelle = ladekurve.ladetabelle(kapazitaet[i], ladeleistung[l[i]])
+        schritte = np.arange(t_out[i] - t_in[i] + 1)
+        # Ein Schritt Reserve, da die Tabelle bei SOC 0 beginnt
+        reserve = (schritte > 0) * ladeleistung[l[i]] * Delta_t / kapazitaet[i]
+        p_unten = ladekurve.max_leistung(ladekurve.soc_nach_schritten(tabelle, SOC_A[i], schritte) + reserve)
+        p_oben = ladekurve.max_leistung(0 if bidirektional else SOC_A[i])
+        for k, t in enumerate(range(t_in[i], t_out[i] + 1)):
+            if p_unten[k] >= ladeleistung[l[i]]:
+                continue
+            elif p_unten[k] == p_oben:
+                p_kurve_konstant[(i, t)] = p_unten[k]
+            else:
+                ladekurve_pwl.append((i, t))
+    
+    # --------------------------------------------------
+    # 2.2) Gurobi-Modell
+    # --------------------------------------------------
+    model = Model("Ladehub_Optimierung", env=env)
+    model.setParam('OutputFlag', 0)
+    
+    # --------------------------------------------------
+    # 2.3) Variablen anlegen
+    # --------------------------------------------------
+    P = {}
+    Pplus = {}
+    Pminus = {}
+    P_max_i = {}
+    SoC = {}
+
+    z = {}
+    
+    P = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], lb=-GRB.INFINITY if bidirektional else 0, vtype=GRB.CONTINUOUS, name="P")
+    Pplus = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], lb=0, vtype=GRB.CONTINUOUS, name="Pplus")
+    Pminus = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], lb=0, vtype=GRB.CONTINUOUS, name="Pminus")
+    P_max_i = model.addVars(ladekurve_pwl, lb=0, vtype=GRB.CONTINUOUS, name="Pmax_i")
+    z = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], vtype=GRB.BINARY, name="z")
+    SoC = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 2)], lb=0, ub=1, vtype=GRB.CONTINUOUS, name="SoC")
+    
+    # --------------------------------------------------
+    # 2.5) Constraints
+    # --------------------------------------------------
+    
+    # Energiebedarf je LKW decken
+    for i in range(I):
+        model.addConstr(quicksum(P[(i, t)] * Delta_t for t in range(t_in[i], t_out[i] + 1)) == E_req[i])        
+    
+    # Leistungsbegrenzung Ladekurve
+    for i in range(I):
+        model.addConstr(SoC[(i, t_in[i])] == SOC_A[i])
+    for i in range(I):
+        for t in range(t_in[i], t_out[i]+1):
+            model.addConstr(SoC[(i, t+1)] == SoC[(i, t)] + (P[(i, t)] * Delta_t / kapazitaet[i]))
+    for (i, t) in P_max_i:
+        model.addGenConstrPWL(SoC[(i, t)], P_max_i[(i, t)], ladekurve.XVALS, ladekurve.YVALS)
+    for (i, t) in P_max_i:
+        model.addConstr(Pplus[(i,t)] <= P_max_i[(i,t)] * z[(i,t)]) 
+        model.addConstr(Pminus[(i,t)] <= P_max_i[(i,t)] * (1-z[(i,t)]))
+    for (i, t), p_kurve in p_kurve_konstant.items():
+        model.addConstr(Pplus[(i,t)] <= p_kurve * z[(i,t)]) 
+        model.addConstr(Pminus[(i,t)] <= p_kurve * (1-z[(i,t)]))
+
+    # Leistungsbegrenzung Ladesäulen-Typ    
+    for i in range(I):
+        typ = l[i]
+        P_max_l = ladeleistung[typ]
+        for t in range(t_in[i], t_out[i] + 1):
+            model.addConstr(Pplus[(i,t)] <= z[(i,t)]     * P_max_l)
+            model.addConstr(Pminus[(i,t)] <= (1-z[(i,t)]) * P_max_l)
+    
+    # Leistungsbegrenzung Netzanschluss
+    for k, aktive_t in enumerate(aktive):
+        t = T_start + k
+        model.addConstr(quicksum(Pplus[(i, t)] + Pminus[(i, t)] for i in aktive_t) <= netzanschluss - vorbelegung['netz'].get(t, 0))    
+    
+    # Hilfsbedingungen
+    for i in range(I):
+        for t in range(t_in[i], t_out[i]+1):
+            model.addConstr(P[(i,t)] == Pplus[(i,t)] - Pminus[(i,t)])
+            
+        # for t in range(t_in[i], t_out[i]):
+        #     model.addConstr(z[(i, t+1)] >= z[(i, t)])
+    
+    # --------------------------------------------------
+    # 2.4) Zielfunktion
+    # --------------------------------------------------
+    
+    if strategie == 'epex':
+        obj_expr = quicksum(P[(i, t)] * epex_price[t] for i in range(I) for t in range(t_in[i], t_out[i] + 1))
+        model.setObjective(obj_expr, GRB.MINIMIZE)
+    elif strategie == 'Tmin':
+        obj_expr = quicksum((t * Pplus[(i, t)]) - (t * Pminus[(i, t)]) for i in range(I) for t in range(t_in[i], t_out[i] + 1))
+        model.setObjective(obj_expr, GRB.MINIMIZE)
+    else:
+        raise ValueError(f"Strategie {strategie} nicht bekannt.")
+
+    # --------------------------------------------------
+    # 2.6) Optimierung
+    # --------------------------------------------------
+    model.optimize()
+    
+    # --------------------------------------------------
+    # 2.7) Ergebnisse in df_lastgang übernehmen
+    # --------------------------------------------------
+    if model.Status == GRB.OPTIMAL:
+        print(f"Optimale Lösung gefunden.")
+        for i in range(I):
+            t_charging = 0
+            for t in range(t_in[i], t_out[i] + 2):
+                dict_lkw_lastgang['LKW_ID'].append(df_lkw_filtered.iloc[i]['Nummer'])
+                dict_lkw_lastgang['Zeit'].append(t*5)
+                dict_lkw_lastgang['Ladetyp'].append(l[i])
+                dict_lkw_lastgang['Ladezeit'].append(t_charging)
+                dict_lkw_lastgang['Preis'].append(epex_price[t])
+                t_charging += 5
+                if t > t_out[i]:
+                    dict_lkw_lastgang['Leistung'].append(None)
+                    dict_lkw_lastgang['Pplus'].append(None)
+                    dict_lkw_lastgang['Pminus'].append(None)
+                    dict_lkw_lastgang['SOC'].append(SoC[(i, t_out[i]+1)].X)
+                    dict_lkw_lastgang['z'].append(None)
+                    continue
+                else:                        
+                    dict_lkw_lastgang['z'].append(z[(i, t)].X)
+                    dict_lkw_lastgang['Pplus'].append(Pplus[(i, t)].X)
+                    dict_lkw_lastgang['Pminus'].append(Pminus[(i, t)].X)
+                    dict_lkw_lastgang['Leistung'].append(P[(i, t)].X)
+                    dict_lkw_lastgang['SOC'].append(SoC[(i, t)].X)  
     
+        cost = (P[(i, t)].X * Delta_t * epex_price[t] for i in range(I) for t in range(t_in[i], t_out[i] + 1))
+        return sum(cost)
+    else:
+        print(f"Keine optimale Lösung für gefunden.")
+        return None
+
+# ======================================================
+# 3) Dekomposition einer Woche in unabhängige Komponenten
+# ======================================================
+
+def komponenten_ueberlappung(t_in, t_out):
+    """
+    Zerlegt die LKW in Komponenten mit überlappenden Standzeiten (Sweep über
+    die sortierten Ankunftszeiten). LKW verschiedener Komponenten teilen sich
+    keinen Zeitschritt und sind damit auch über den Netzanschluss nicht gekoppelt.
+    Rückgabe: Liste von Index-Arrays (Positionen in t_in/t_out).
+    """
+    t_in = np.asarray(t_in)
+    t_out = np.asarray(t_out)
+    if len(t_in) == 0:
+        return []
+    reihenfolge = np.argsort(t_in, kind='stable')
+    ende_bisher = np.maximum.accumulate(t_out[reihenfolge])
+    # Neue Komponente, wenn die Ankunft nach dem bisher spätesten Ende liegt
+    neu = np.empty(len(reihenfolge), dtype=bool)
+    neu[0] = True
+    neu[1:] = t_in[reihenfolge[1:]] > ende_bisher[:-1]
+    return np.split(reihenfolge, np.flatnonzero(neu)[1:])
+
+def netzanschluss_bindet(t_in, t_out, p_max, netzanschluss, belegt=None):
+    """
+    Prüft, ob die Summe der maximal möglichen Ladeleistungen der LKW zu
+    irgendeinem Zeitschritt den Netzanschluss überschreiten kann.
+    belegt: optional dict Zeitschritt -> bereits fest belegte Kapazität.
+    """
+    t_in = np.asarray(t_in)
+    t_out = np.asarray(t_out)
+    start = t_in.min()
+    last = np.zeros(t_out.max() - start + 2)
+    np.add.at(last, t_in - start, p_max)
+    np.add.at(last, t_out - start + 1, -np.asarray(p_max, dtype=float))
+    last = np.cumsum(last)
+    if belegt:
+        for t, wert in belegt.items():
+            if start <= t <= t_out.max():
+                last[t - start] += wert
+    return last.max() > netzanschluss
+
+def greedy_lkw(t_a, t_d, e_req, p_max, epex_price, strategie):
+    """
+    Geschlossene Lösung für einen einzelnen LKW ohne bindenden Netzanschluss und
+    ohne bindende Ladekurve: 'epex' füllt die günstigsten Zeitschritte zuerst,
+    'Tmin' lädt so früh wie möglich. Rückgabe: Leistung je Zeitschritt
+    (None, falls E_req im Zeitfenster nicht erreichbar ist).
+    """
+    Delta_t = 5 / 60.0
+    n = t_d - t_a + 1
+    if e_req < 0 or e_req > n * p_max * Delta_t + 1e-9:
+        return None
+    if strategie == 'epex':
+        reihenfolge = np.argsort(np.asarray(epex_price[t_a:t_d + 1]), kind='stable')
+    elif strategie == 'Tmin':
+        reihenfolge = np.arange(n)
+    else:
+        raise ValueError(f"Strategie {strategie} nicht bekannt.")
+    # Zeitschritte in Reihenfolge mit voller Leistung belegen, Rest im letzten
+    bereits = np.arange(n) * p_max
+    leistung = np.zeros(n)
+    leistung[reihenfolge] = np.clip(e_req / Delta_t - bereits, 0, p_max)
+    return leistung
+
+def greedy_ergebnisse(df_lkws, leistungen, epex_price, dict_lkw_lastgang):
+    """
+    Überträgt Greedy-Fahrpläne im Format von optimierung_woche in dict_lkw_lastgang.
+    Rückgabe: Kosten in €.
+    """
+    Delta_t = 5 / 60.0
+    cost = 0
+    for (_, row), leistung in zip(df_lkws.iterrows(), leistungen):
+        t_a, t_d = row['t_a'], row['t_d']
+        soc = row['SOC'] + np.concatenate(([0], np.cumsum(leistung) * Delta_t / row['Kapazitaet']))
+        for k, t in enumerate(range(t_a, t_d + 2)):
+            dict_lkw_lastgang['LKW_ID'].append(row['Nummer'])
+            dict_lkw_lastgang['Zeit'].append(t*5)
+            dict_lkw_lastgang['Ladetyp'].append(row['Ladesäule'])
+            dict_lkw_lastgang['Ladezeit'].append(k*5)
+            dict_lkw_lastgang['Preis'].append(epex_price[t])
+            dict_lkw_lastgang['SOC'].append(soc[k])
+            if t > t_d:
+                dict_lkw_lastgang['Leistung'].append(None)
+                dict_lkw_lastgang['Pplus'].append(None)
+                dict_lkw_lastgang['Pminus'].append(None)
+                dict_lkw_lastgang['z'].append(None)
+            else:
+                dict_lkw_lastgang['Leistung'].append(leistung[k])
+                dict_lkw_lastgang['Pplus'].append(leistung[k])
+                dict_lkw_lastgang['Pminus'].append(0.0)
+                dict_lkw_lastgang['z'].append(1.0 if leistung[k] > 0 else 0.0)
+        cost += np.sum(leistung * Delta_t * np.asarray(epex_price[t_a:t_d + 1]))
+    return cost
+
+def optimierung_komponente(df_komponente, epex_price, ladeleistung, netzanschluss, strategie, bidirektional, max_saeulen=None, vorbelegung=None):
+    """
+    Löst eine Komponente als eigenes Gurobi-Modell (mit eigenem Env, damit
+    Komponenten parallel in Threads gelöst werden können). Die Parallelität
+    kommt aus dem Thread-Pool, daher nutzt jedes Modell nur einen Solver-Thread.
+    """
+    from gurobipy import Env
+
+    dict_komponente = neues_lastgang_dict()
+    with Env(params={'OutputFlag': 0, 'Threads': 1}) as env:
+        cost = optimierung_woche(df_komponente, epex_price, ladeleistung, netzanschluss, strategie, bidirektional, dict_komponente, env=env, max_saeulen=max_saeulen, vorbelegung=vorbelegung)
+    return dict_komponente, cost
+
+def optimierung_woche_dekomponiert(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, bidirektional, dict_lkw_lastgang, executor=None, max_saeulen=None, vorbelegung=None):
+    """
+    Wie optimierung_woche, zerlegt die Woche aber in Komponenten überlappender
+    Standzeiten und löst diese getrennt (mit executor parallel). Kann der
+    Netzanschluss in einer Komponente nicht binden, werden LKW, deren Ladekurve
+    unterhalb der Säulenleistung nicht greift, per Greedy-Fahrplan geladen und
+    die übrigen LKW einzeln optimiert.
+    Rückgabe: Kosten der Woche in € (None, falls eine Komponente ohne Lösung bleibt;
+    dann werden für die Woche keine Lastgänge übernommen).
+    """
+    if len(df_lkw_filtered) == 0:
+        return 0.0
+    if vorbelegung is None:
+        vorbelegung = {'netz': {}, 'saeulen': {}}
+    # Die Säulenzahl koppelt keine Ladeleistungen, sie wird einmal für die ganze Woche geprüft
+    if max_saeulen is not None and not saeulen_pruefen(df_lkw_filtered, max_saeulen, vorbelegung['saeulen']):
+        return None
+    df_lkw_filtered = df_lkw_filtered.reset_index(drop=True)
+    t_in = df_lkw_filtered['t_a'].to_numpy()
+    t_out = df_lkw_filtered['t_d'].to_numpy()
+    p_max = np.array([min(ladeleistung[typ], max(ladekurve.YVALS)) for typ in df_lkw_filtered['Ladesäule']])
+    # Greedy nur, wenn die Ladekurve nie unter die Säulenleistung fällt
+    greedy_moeglich = (p_max <= min(ladekurve.YVALS)) & (not bidirektional)
+
+    cost = 0
+    kein_ergebnis = False
+    dict_woche = neues_lastgang_dict()
+    aufgaben = []
+    for komponente in komponenten_ueberlappung(t_in, t_out):
+        if netzanschluss_bindet(t_in[komponente], t_out[komponente], p_max[komponente], netzanschluss, vorbelegung['netz']):
+            aufgaben.append(komponente)
+            continue
+
+        greedy = komponente[greedy_moeglich[komponente]]
+        leistungen = [
+            greedy_lkw(t_in[i], t_out[i], df_lkw_filtered.loc[i, 'E_req'], p_max[i], epex_price, strategie)
+            for i in greedy
+        ]
+        if any(leistung is None for leistung in leistungen):
+            print(f"Keine optimale Lösung für gefunden.")
+            kein_ergebnis = True
+        else:
+            cost += greedy_ergebnisse(df_lkw_filtered.loc[greedy], leistungen, epex_price, dict_woche)
+
+        # Ohne bindenden Netzanschluss sind die übrigen
+        # LKW unabhängig voneinander: je LKW ein eigenes (kleines) Modell
+        rest = komponente[~greedy_moeglich[komponente]]
+        aufgaben.extend(rest[k:k + 1] for k in range(len(rest)))
+
+    args = (epex_price, ladeleistung, netzanschluss, strategie, bidirektional, None, vorbelegung)
+    if executor is None:
+        ergebnisse = [optimierung_komponente(df_lkw_filtered.loc[k], *args) for k in aufgaben]
+    else:
+        ergebnisse = executor.map(lambda k: optimierung_komponente(df_lkw_filtered.loc[k], *args), aufgaben)
+
+    for dict_komponente, cost_komponente in ergebnisse:
+        if cost_komponente is None:
+            kein_ergebnis = True
+            continue
+        cost += cost_komponente
+        for key in dict_woche:
+            dict_woche[key] += dict_komponente[key]
+
+    if kein_ergebnis:
+        return None
+    for key in dict_lkw_lastgang:
+        dict_lkw_lastgang[key] += dict_woche[key]
+    return cost
+
+def datenimport(szenario):
+    """
+    Liest EPEX-Preise, LKW mit LoadStatus (sortiert nach Ankunft) und die
+    Ladehub-Konfiguration eines Szenarios ein.
+    """
+    path = os.path.dirname(os.path.abspath(__file__))
+    
+    df_epex = pd.read_csv(os.path.join(path, 'input', 'epex_week.csv'), sep=';', decimal=',', index_col=0)
+    
+    df_lkw  = pd.read_csv(os.path.join(path, 'data', 'lkws', f'eingehende_lkws_loadstatus_{szenario}.csv'), sep=';', decimal=',', index_col=0)
+    df_lkw.sort_values(by=['Ankunftszeit_total'], inplace=True)
+    df_lkw.reset_index(drop=True, inplace=True)
+    
+    df_ladehub = pd.read_csv(os.path.join(path, 'data','konfiguration_ladehub',f'anzahl_ladesaeulen_{szenario}.csv'), sep=';', decimal=',')
+    
+    return df_epex, df_lkw, df_ladehub
+
+def lastgang_hub(df_epex, df_lkw_lastgang):
+    """
+    Summiert die positiven Ladeleistungen aller LKW je Zeitschritt zum Lastgang des Hubs.
+    """
+    df_lastgang = df_epex.copy()
+    df_lastgang['Leistung'] = 0.0
+    df_lastgang['Zeit_Num'] = range(0, len(df_lastgang) * 5, 5)
+    df_lastgang.drop(['Tag', 'Uhrzeit', 'Wochentag'], axis=1, inplace=True)
+    
+    leistung = pd.to_numeric(df_lkw_lastgang['Leistung'], errors='coerce')
+    leistung_zeit = leistung[leistung > 0].groupby(df_lkw_lastgang['Zeit']).sum()
+    df_lastgang['Leistung'] = df_lastgang['Zeit_Num'].map(leistung_zeit).fillna(0.0)
+    return df_lastgang
+
+def modellierung_epex(szenario, strategie, dekomposition=True, presolve=False):
+    df_epex, df_lkw, df_ladehub = datenimport(szenario)
+    return modellierung_epex_daten(szenario, strategie, df_epex, df_lkw, df_ladehub, dekomposition, presolve)
+
+def modellierung_epex_daten(szenario, strategie, df_epex, df_lkw, df_ladehub, dekomposition=True, presolve=False):
+    """
+    Wie modellierung_epex, aber mit bereits eingelesenen Daten (z.B. aus
+    pipeline_async, das die Eingaben im Hintergrund vorlädt).
+    presolve=True fixiert LKW ohne Spielraum vorab (epex_presolve); standardmäßig
+    aus, da er in den Szenarien kaum LKW fixiert (siehe presolve_bericht).
+    """
+    dict_lkw_lastgang = neues_lastgang_dict()
+
+    cluster, bidirektional, ladeleistung, max_saeulen, netzanschluss = szenario_parameter(szenario, df_ladehub)
+    epex_price = df_epex['Preis'].tolist()
+    
+    executor = ThreadPoolExecutor(max_workers=os.cpu_count()) if dekomposition else None
+    
+    total_cost = 0
     for week in range(52):
         print(f"Optimierung Woche {week+1}")
-        df_lkw_filtered = df_lkw[(df_lkw['LoadStatus'] == 1) & (df_lkw['Wochentag']>=1+week*7) & (df_lkw['Wochentag']<=7+week*7)][:].copy()
-        T = 288 * 8          # = 2304
-        Delta_t = 5 / 60.0   # Zeitintervall in Stunden (5 Minuten)
         # ======================================================
         # 2) Schleife über die Ladestrategien
         # ======================================================
         # --------------------------------------------------
         # 2.1) LKW-Daten vorbereiten/filtern
         # --------------------------------------------------
-        df_lkw_filtered['t_a'] = ((df_lkw_filtered['Ankunftszeit_total']) // 5).astype(int)
-        df_lkw_filtered['t_d'] = ((df_lkw_filtered['Ankunftszeit_total'] + df_lkw_filtered['Pausenlaenge'] - 5) // 5).astype(int)
-        t_in = df_lkw_filtered['t_a'].tolist()
-        t_out = df_lkw_filtered['t_d'].tolist()
-        l = df_lkw_filtered['Ladesäule'].tolist()
-        SOC_A = df_lkw_filtered['SOC'].tolist()
-        kapazitaet = df_lkw_filtered['Kapazitaet'].tolist()
-        epex_price = df_epex['Preis'].tolist()
-        
-        SOC_req = []
-        for index, row in df_lkw_filtered.iterrows():
-            if row['Ladesäule'] == 'NCS':
-                SOC_req.append(1)
-            else:
-                SOC_req.append(4.5 * 1.26 * 80 / row['Kapazitaet'] + 0.15)
-        
-        E_req = [kapazitaet[i] * (SOC_req[i] - SOC_A[i]) for i in range(len(df_lkw_filtered))]
-        I = len(df_lkw_filtered)
-        
-        # --------------------------------------------------
-        # 2.2) Gurobi-Modell
-        # --------------------------------------------------
-        model = Model("Ladehub_Optimierung")
-        model.setParam('OutputFlag', 0)
-        
-        # --------------------------------------------------
-        # 2.3) Variablen anlegen
-        # --------------------------------------------------
-        P = {}
-        Pplus = {}
-        Pminus = {}
-        P_max_i = {}
-        SoC = {}
-
-        z = {}
-        
-        P = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], lb=-GRB.INFINITY if bidirektional else 0, vtype=GRB.CONTINUOUS, name="P")
-        Pplus = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], lb=0, vtype=GRB.CONTINUOUS, name="Pplus")
-        Pminus = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], lb=0, vtype=GRB.CONTINUOUS, name="Pminus")
-        P_max_i = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], lb=0, vtype=GRB.CONTINUOUS, name="Pmax_i")
-        # X = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], vtype=GRB.BINARY, name="X")
-        z = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 1)], vtype=GRB.BINARY, name="z")
-        SoC = model.addVars([(i, t) for i in range(I) for t in range(t_in[i], t_out[i] + 2)], lb=0, ub=1, vtype=GRB.CONTINUOUS, name="SoC")
-        
-        # --------------------------------------------------
-        # 2.5) Constraints
-        # --------------------------------------------------
-        
-        # # Begrenzung Anzahl Ladesäulen
-        # model.addConstrs((X[(i, t)] == 1 for i in range(I) for t in range(t_in[i], t_out[i] + 1)), name="X_equals_1")
-        
-        # for t in range(T):
-        #     for typ in max_saeulen:
-        #         relevant_i = [i for i in range(I) if l[i] == typ and (t_in[i] <= t <= t_out[i])]
-        #         if len(relevant_i) > 0:
-        #             model.addConstr(quicksum(X[(i, t)] for i in relevant_i) <= max_saeulen[typ],name=f"saeulen_{typ}_{t}")        
-        
-        # Energiebedarf je LKW decken
-        for i in range(I):
-            model.addConstr(quicksum(P[(i, t)] * Delta_t for t in range(t_in[i], t_out[i] + 1)) == E_req[i])        
-        
-        # Leistungsbegrenzung Ladekurve
-        for i in range(I):
-            model.addConstr(SoC[(i, t_in[i])] == SOC_A[i])
-        for i in range(I):
-            for t in range(t_in[i], t_out[i]+1):
-                model.addConstr(SoC[(i, t+1)] == SoC[(i, t)] + (P[(i, t)] * Delta_t / kapazitaet[i]))
-        xvals = [0.0, 0.5, 0.5, 0.8, 0.8, 1.0]
-        yvals = [1000, 1000, 800, 800, 500, 500]
-        for i in range(I):
-            for t in range(t_in[i], t_out[i] + 1):
-                model.addGenConstrPWL(SoC[(i, t)], P_max_i[(i, t)],xvals, yvals)
-        for i in range(I):
-            for t in range(t_in[i], t_out[i] + 1):
-                model.addConstr(Pplus[(i,t)] <= P_max_i[(i,t)] * z[(i,t)]) 
-                model.addConstr(Pminus[(i,t)] <= P_max_i[(i,t)] * (1-z[(i,t)]))
-
-        # Leistungsbegrenzung Ladesäulen-Typ    
-        for i in range(I):
-            typ = l[i]
-            P_max_l = ladeleistung[typ]
-            for t in range(t_in[i], t_out[i] + 1):
-                model.addConstr(Pplus[(i,t)] <= z[(i,t)]     * P_max_l)
-                model.addConstr(Pminus[(i,t)] <= (1-z[(i,t)]) * P_max_l)
-        
-        # Leistungsbegrenzung Netzanschluss
-        for t in range(T):
-            model.addConstr(quicksum(Pplus[(i, t)] + Pminus[(i, t)] for i in range(I) if t_in[i] <= t <= t_out[i]) <= netzanschluss)    
-        
-        # Hilfsbedingungen
-        for i in range(I):
-            for t in range(t_in[i], t_out[i]+1):
-                model.addConstr(P[(i,t)] == Pplus[(i,t)] - Pminus[(i,t)])
-                
-            # for t in range(t_in[i], t_out[i]):
-            #     model.addConstr(z[(i, t+1)] >= z[(i, t)])
-        
-        # --------------------------------------------------
-        # 2.4) Zielfunktion
-        # --------------------------------------------------
-        
-        if strategie == 'epex':
-            obj_expr = quicksum(P[(i, t)] * epex_price[t] for i in range(I) for t in range(t_in[i], t_out[i] + 1))
-            model.setObjective(obj_expr, GRB.MINIMIZE)
-        elif strategie == 'Tmin':
-            obj_expr = quicksum((t * Pplus[(i, t)]) - (t * Pminus[(i, t)]) for i in range(I) for t in range(t_in[i], t_out[i] + 1))
-            model.setObjective(obj_expr, GRB.MINIMIZE)
+        df_lkw_filtered = lkw_woche(df_lkw, week)
+        belegung = None
+        dict_fest = neues_lastgang_dict()
+        cost_fest = 0
+        if presolve and len(df_lkw_filtered) > 0:
+            # LKW ohne Spielraum analytisch fixieren, nicht erreichbare melden
+            klasse, fahrplaene = epex_presolve.presolve_woche(df_lkw_filtered, ladeleistung, bidirektional)
+            df_fest = df_lkw_filtered.loc[list(fahrplaene)]
+            cost_fest = greedy_ergebnisse(df_fest, fahrplaene.values(), epex_price, dict_fest)
+            belegung = epex_presolve.vorbelegung(df_lkw_filtered, fahrplaene)
+            anzahl_unzulaessig = (klasse == 'unzulaessig').sum()
+            if anzahl_unzulaessig > 0:
+                print(f"E_req nicht erreichbar für {anzahl_unzulaessig} LKW.")
+            print(f"Presolve: {len(fahrplaene)} LKW fixiert, {(klasse == 'flexibel').sum()} LKW im Modell")
+            df_lkw_filtered = df_lkw_filtered[klasse == 'flexibel']
+        if dekomposition:
+            cost = optimierung_woche_dekomponiert(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, bidirektional, dict_lkw_lastgang, executor, max_saeulen, belegung)
         else:
-            raise ValueError(f"Strategie {strategie} nicht bekannt.")
+            cost = optimierung_woche(df_lkw_filtered, epex_price, ladeleistung, netzanschluss, strategie, bidirektional, dict_lkw_lastgang, max_saeulen=max_saeulen, vorbelegung=belegung)
+        # Fixierte LKW nur übernehmen, wenn die Woche insgesamt gelöst wurde
+        if cost is not None:
+            total_cost += cost + cost_fest
+            for key in dict_lkw_lastgang:
+                dict_lkw_lastgang[key] += dict_fest[key]
 
-        # --------------------------------------------------
-        # 2.6) Optimierung
-        # --------------------------------------------------
-        model.optimize()
-        
-        # --------------------------------------------------
-        # 2.7) Ergebnisse in df_lastgang übernehmen
-        # --------------------------------------------------
-        if model.Status == GRB.OPTIMAL:
-            print(f"Optimale Lösung gefunden.")
-            for i in range(I):
-                t_charging = 0
-                for t in range(T):   
-                    if t_in[i] <= t <= t_out[i]+1:
-                        dict_lkw_lastgang['LKW_ID'].append(df_lkw_filtered.iloc[i]['Nummer'])
-                        dict_lkw_lastgang['Zeit'].append(t*5)
-                        dict_lkw_lastgang['Ladetyp'].append(l[i])
-                        dict_lkw_lastgang['Ladezeit'].append(t_charging)
-                        dict_lkw_lastgang['Preis'].append(epex_price[t])
-                        t_charging += 5
-                        if t > t_out[i]:
-                            dict_lkw_lastgang['Leistung'].append(None)
-                            dict_lkw_lastgang['Pplus'].append(None)
-                            dict_lkw_lastgang['Pminus'].append(None)
-                            dict_lkw_lastgang['SOC'].append(SoC[(i, t_out[i]+1)].X)
-                            dict_lkw_lastgang['z'].append(None)
-                            continue
-                        else:                        
-                            dict_lkw_lastgang['z'].append(z[(i, t)].X)
-                            dict_lkw_lastgang['Pplus'].append(Pplus[(i, t)].X)
-                            dict_lkw_lastgang['Pminus'].append(Pminus[(i, t)].X)
-                            dict_lkw_lastgang['Leistung'].append(P[(i, t)].X)
-                            dict_lkw_lastgang['SOC'].append(SoC[(i, t)].X)  
-                            
-        else:
-            print(f"Keine optimale Lösung für gefunden.")
-    
+    if executor is not None:
+        executor.shutdown()
 
     df_lkw_lastgang = pd.DataFrame(dict_lkw_lastgang)
     df_lkw_lastgang.sort_values(by=['LKW_ID', 'Zeit'], inplace=True)
     
-    for _, row in df_lkw_lastgang.iterrows():
-        leistung = row['Leistung']        
-   
-        
-        if leistung > 0:
-            df_lastgang.loc[df_lastgang['Zeit_Num'] == row['Zeit'], 'Leistung'] += leistung
-            
-    
+    df_lastgang = lastgang_hub(df_epex, df_lkw_lastgang)
     
-    cost = (P[(i, t)].X * (5/60) * epex_price[t] for i in range(I) for t in range(t_in[i], t_out[i] + 1))
-    total_cost = sum(cost)
     print(f"Total cost: {total_cost} € für Strategie {strategie}")
     
     return df_lkw_lastgang, df_lastgang
 
 def main():
-    df_lkw_lastgang_main = pd.DataFrame()
-    df_lastgang_main = pd.DataFrame()
-    
     strategies = ['epex', 'Tmin']
+    ergebnisse = []
     
     for szenario in config.list_szenarien:
+        # Je Szenario eine eigene Datei: Lastgänge nur dieses Szenarios sammeln
+        df_lkw_lastgang_main = pd.DataFrame()
+        df_lastgang_main = pd.DataFrame()
         for strategie in strategies:
             print(f"Optimierung EPEX: {szenario}")
             df_lkw_lastgang, df_lastgang = modellierung_epex(szenario, strategie)
+            ergebnisse.append((szenario, strategie, df_lkw_lastgang, df_lastgang))
             df_lkw_lastgang['Strategie'] = strategie
             df_lastgang['Strategie'] = strategie
             df_lkw_lastgang_main = pd.concat([df_lkw_lastgang_main, df_lkw_lastgang])
@@ -258,6 +602,9 @@ def main():
         df_lkw_lastgang_main.to_csv(os.path.join(path, 'data', 'lastgang_lkw_epex', f'lastgang_lkw_{szenario}.csv'), sep=';', decimal=',', index=False)
         df_lastgang_main.to_csv(os.path.join(path, 'data', 'lastgang_epex', f'lastgang_{szenario}.csv'), sep=';', decimal=',', index=True)
     
+    # Memory-mapped Speicher für die Auswertung
+    lastgang_speicher.speichern('epex', ergebnisse)
+    
     
 if __name__ == '__main__':
     start = time.time()
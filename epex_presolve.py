@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import ladekurve
+
+# ======================================================
+# Presolve: trivial bestimmte LKW vor dem Modellaufbau fixieren
+# ======================================================
+
+def volllast_fahrplan(soc_a, kapazitaet, ladeleistung, schritte):
+    """
+    Exakter Fahrplan bei Laden mit maximaler Leistung min(Ladeleistung, Ladekurve(SOC))
+    über schritte Zeitschritte, wie im Modell über den SOC zu Beginn des Schritts.
+    Rückgabe: Leistung je Zeitschritt und Maske der Zeitschritte, in denen statt
+    Säule oder Ladekurve die Obergrenze SOC = 1 die Leistung begrenzt.
+    """
+    Delta_t = 5 / 60.0
+    leistung = np.zeros(schritte)
+    soc_begrenzt = np.zeros(schritte, dtype=bool)
+    soc = soc_a
+    for k in range(schritte):
+        p_max = min(ladeleistung, ladekurve.max_leistung(soc))
+        leistung[k] = min(p_max, (1 - soc) * kapazitaet / Delta_t)
+        soc_begrenzt[k] = leistung[k] < p_max
+        soc += leistung[k] * Delta_t / kapazitaet
+    return leistung, soc_begrenzt
+
+def presolve_woche(df_lkw_filtered, ladeleistung, bidirektional, toleranz=1e-3):
+    """
+    Klassifiziert die LKW einer Woche anhand von Energieschranken:
+    - 'fest': kein Spielraum, entweder E_req <= 0 (ohne Entladen, Fahrplan 0) oder
+      E_req nur erreichbar, wenn in jedem Zeitschritt des Fensters mit der durch
+      Säule und Ladekurve begrenzten Höchstleistung geladen wird
+    - 'unzulaessig': E_req liegt über der exakten Energieschranke
+      (ladekurve.energie_obergrenze, berücksichtigt die Sprungstellen)
+    - 'flexibel': alle übrigen LKW, nur diese gehen in das Modell
+    Volllast ist nur dann der einzige Fahrplan mit Höchstenergie, wenn der SOC dabei
+    keine wirksame Sprungstelle der Ladekurve überschreitet; sonst bleibt der LKW flexibel.
+    Rückgabe: Series mit Klasse je LKW und dict LKW-Index -> Fahrplan der festen LKW.
+    """
+    Delta_t = 5 / 60.0
+    schritte = (df_lkw_filtered['t_d'] - df_lkw_filtered['t_a'] + 1).to_numpy()
+    e_req = df_lkw_filtered['E_req'].to_numpy()
+    p_saeule = df_lkw_filtered['Ladesäule'].map(ladeleistung).to_numpy(dtype=float)
+
+    soc_a = df_lkw_filtered['SOC'].to_numpy(dtype=float)
+    kapazitaet = df_lkw_filtered['Kapazitaet'].to_numpy(dtype=float)
+    # Mit Entladen ist jeder SOC ab 0 erreichbar (Schranke dann ggf. nicht scharf)
+    soc_min = 0.0 if bidirektional else soc_a
+    e_max = ladekurve.energie_obergrenze(kapazitaet, p_saeule, soc_a, schritte, soc_min)
+
+    klasse = np.full(len(df_lkw_filtered), 'flexibel', dtype=object)
+    fahrplaene = {}
+
+    if not bidirektional:
+        # SOC_A liegt bereits über SOC_req: nicht laden
+        keine_ladung = e_req <= toleranz
+        klasse[keine_ladung] = 'fest'
+        for j in np.flatnonzero(keine_ladung):
+            fahrplaene[df_lkw_filtered.index[j]] = np.zeros(schritte[j])
+
+    unzulaessig = (klasse == 'flexibel') & (e_req > e_max + toleranz)
+    klasse[unzulaessig] = 'unzulaessig'
+
+    # Nur LKW an der Schranke können fest sein: Volllast-Fahrplan exakt nachrechnen
+    kandidaten = np.flatnonzero((klasse == 'flexibel') & (e_req >= e_max - toleranz))
+    for j in kandidaten:
+        leistung, soc_begrenzt = volllast_fahrplan(soc_a[j], kapazitaet[j], p_saeule[j], schritte[j])
+        e_voll = leistung.sum() * Delta_t
+        # Fest nur ohne Leerlauf, ohne SOC-Grenze und ohne Sprungstelle: Erreicht der LKW
+        # SOC = 1 vor Ende des Fensters, lädt er nur mit Teilleistung oder lohnt es sich,
+        # vor einer Sprungstelle zu verweilen, lässt sich das Laden verschieben
+        if (e_req[j] >= e_voll - toleranz and (leistung > 0).all() and not soc_begrenzt.any()
+                and not ladekurve.sprung_im_bereich(p_saeule[j], 0.0 if bidirektional else soc_a[j], soc_a[j] + e_voll / kapazitaet[j])):
+            klasse[j] = 'fest'
+            # Restabweichung im letzten Ladeschritt ausgleichen, damit E_req exakt erreicht wird
+            leistung[-1] += (e_req[j] - e_voll) / Delta_t
+            fahrplaene[df_lkw_filtered.index[j]] = leistung
+
+    return pd.Series(klasse, index=df_lkw_filtered.index), fahrplaene
+
+def vorbelegung(df_lkw_filtered, fahrplaene):
+    """
+    Netz- und Ladesäulenbelegung der festen LKW je Zeitschritt, die das Modell
+    der flexiblen LKW berücksichtigen muss.
+    Rückgabe: {'netz': {t: kW}, 'saeulen': {(typ, t): Anzahl}}
+    """
+    netz = {}
+    saeulen = {}
+    for index, leistung in fahrplaene.items():
+        row = df_lkw_filtered.loc[index]
+        for k, t in enumerate(range(row['t_a'], row['t_d'] + 1)):
+            netz[t] = netz.get(t, 0) + leistung[k]
+            saeulen[(row['Ladesäule'], t)] = saeulen.get((row['Ladesäule'], t), 0) + 1
+    return {'netz': netz, 'saeulen': saeulen}
+
+def modellgroesse(df_lkw):
+    """
+    Anzahl (LKW, Zeitschritt)-Paare und Variablen (P, Pplus, Pminus, z je Paar
+    sowie SoC je Paar plus Endzustand) für die übergebenen LKW.
+    """
+    paare = int((df_lkw['t_d'] - df_lkw['t_a'] + 1).sum())
+    return paare, 5 * paare + len(df_lkw)
+
+def presolve_bericht(szenario, wochen=range(52)):
+    """
+    Wendet den Presolve auf alle Wochen eines Szenarios an und berichtet, wie stark
+    das Modell schrumpft. Benötigt nur die LKW-Daten und die Ladehub-Konfiguration.
+    """
+    import epex_optimierung
+
+    path = os.path.dirname(os.path.abspath(__file__))
+    df_lkw = pd.read_csv(os.path.join(path, 'data', 'lkws', f'eingehende_lkws_loadstatus_{szenario}.csv'), sep=';', decimal=',', index_col=0)
+    df_lkw.sort_values(by=['Ankunftszeit_total'], inplace=True)
+    df_lkw.reset_index(drop=True, inplace=True)
+    df_ladehub = pd.read_csv(os.path.join(path, 'data', 'konfiguration_ladehub', f'anzahl_ladesaeulen_{szenario}.csv'), sep=';', decimal=',')
+    cluster, bidirektional, ladeleistung, max_saeulen, netzanschluss = epex_optimierung.szenario_parameter(szenario, df_ladehub)
+
+    zeilen = []
+    for week in wochen:
+        df_lkw_filtered = epex_optimierung.lkw_woche(df_lkw, week)
+        if len(df_lkw_filtered) == 0:
+            continue
+        klasse, _ = presolve_woche(df_lkw_filtered, ladeleistung, bidirektional)
+        paare_vorher, variablen_vorher = modellgroesse(df_lkw_filtered)
+        paare_nachher, variablen_nachher = modellgroesse(df_lkw_filtered[klasse == 'flexibel'])
+        zeilen.append({
+            'Woche': week + 1,
+            'LKW': len(df_lkw_filtered),
+            'fest': int((klasse == 'fest').sum()),
+            'unzulaessig': int((klasse == 'unzulaessig').sum()),
+            'flexibel': int((klasse == 'flexibel').sum()),
+            'Paare_vorher': paare_vorher,
+            'Paare_nachher': paare_nachher,
+            'Variablen_vorher': variablen_vorher,
+            'Variablen_nachher': variablen_nachher,
+        })
+
+    df_bericht = pd.DataFrame(zeilen)
+    summe = df_bericht.drop(columns='Woche').sum()
+    print(df_bericht.to_string(index=False))
+    print(f"Gesamt: {summe['fest']} fest, {summe['unzulaessig']} unzulässig, {summe['flexibel']} flexibel; "
+          f"Variablen {summe['Variablen_vorher']} -> {summe['Variablen_nachher']} "
+          f"({1 - summe['Variablen_nachher'] / summe['Variablen_vorher']:.1%} weniger)")
+    return df_bericht
@@ -1,10 +1,10 @@
+import heapq
 import pandas as pd
 import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
 import os
 import config
 import time
+from concurrent.futures import ProcessPoolExecutor
 
 def datenimport():
     path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
@@ -19,6 +19,9 @@ def build_flow_network(df_filter, anzahl_ladesaeulen):
     - Zeitknoten sind miteinander verbunden mit Kapazität = anzahl_ladesaeulen.
     - SuperSource (S) -> LKW{i}_arr und LKW{i}_dep -> SuperSink (T) limitieren pro LKW den Fluss auf 1.
     """
+    # networkx erst hier laden; die Frontier-Berechnung kommt ohne aus
+    import networkx as nx
+
     G = nx.DiGraph()
 
     # Super-Source und Super-Sink
@@ -80,21 +83,95 @@ def build_flow_network(df_filter, anzahl_ladesaeulen):
     return flow_dict
     # return G, S, T
 
-def konfiguration_ladehub(df_eingehende_lkws, szenario):
+def szenario_ladequoten(szenario):
     """
-    Hauptfunktion: Ermittelt pro Lade-Typ (HPC/MCS/NCS), wie viele Ladesäulen
-    benötigt werden, um eine Ziel-Ladequote zu erreichen. Speichert zudem pro
-    LKW, ob er letztlich geladen wurde (LoadStatus).
+    Parst Cluster und Ziel-Ladequoten je Lade-Typ aus der Szenario-Bezeichnung.
     """
-    df_eingehende_lkws_loadstatus = pd.DataFrame()
-
-    # Szenario-Einstellungen parsen
     cluster = int(szenario.split('_')[1])
     dict_ladequoten = {
         'NCS': float(szenario.split('_')[3].split('-')[0])/100,
         'HPC': float(szenario.split('_')[3].split('-')[1])/100,
         'MCS': float(szenario.split('_')[3].split('-')[2])/100
     }
+    return cluster, dict_ladequoten
+
+def ladesaeulen_ladetyp(df_eingehende_lkws_filter, ladquote_ziel, ladetyp):
+    """
+    Erhöht die Anzahl Ladesäulen für die gefilterten LKW eines Lade-Typs, bis die
+    Ziel-Ladequote erreicht ist. Rückgabe: Anzahl Ladesäulen, erreichte Ladequote
+    und die LKW mit LoadStatus (None, falls die Ziel-Ladequote nicht erreicht wurde).
+    """
+    ankommende_lkws     = len(df_eingehende_lkws_filter)
+    ladequote           = 0
+    anzahl_ladesaeulen  = 1
+
+    # Wiederholung in Schritten bis zur Ziel-Ladequote
+    for durchgang in range(ankommende_lkws):
+        # Graphen via Node-Splitting-Ansatz aufbauen
+        # G, S, T = build_flow_network(df_eingehende_lkws_filter, anzahl_ladesaeulen)
+        flow_dict = build_flow_network(df_eingehende_lkws_filter, anzahl_ladesaeulen)
+
+        # Max-Flow-Min-Cost
+        # flow_dict = nx.max_flow_min_cost(G, S, T)
+
+        # Bestimmen, wie viele LKW tatsächlich geladen wurden
+        lkw_geladen = 0
+        for idx, row in df_eingehende_lkws_filter.iterrows():
+            # Prüfe, ob Fluss über LKW{i}_arr -> LKW{i}_dep > 0
+            lkw_id = row['Nummer']
+            lkw_arr = f"LKW{lkw_id}_arr"
+            lkw_dep = f"LKW{lkw_id}_dep"
+            flow_val = flow_dict.get(lkw_arr, {}).get(lkw_dep, None)
+            if flow_val > 0:
+                lkw_geladen += 1
+
+        # Ladequote berechnen
+        ladequote = lkw_geladen / ankommende_lkws
+
+        print(f"[{ladetyp}], Ladesäulen={anzahl_ladesaeulen}, Ladequote={ladequote}")
+
+        # Falls Ziel-Ladequote erreicht/überschritten, LoadStatus speichern & Abbruch
+        if ladequote >= ladquote_ziel:
+            liste_lkw_status = []
+            for idx, row in df_eingehende_lkws_filter.iterrows():
+                lkw_id = row['Nummer']
+                lkw_arr = f"LKW{lkw_id}_arr"
+                lkw_dep = f"LKW{lkw_id}_dep"
+                flow_of_this_truck = flow_dict.get(lkw_arr, {}).get(lkw_dep, 0)
+                if flow_of_this_truck > 0:
+                    liste_lkw_status.append(1)
+                else:
+                    liste_lkw_status.append(0)
+
+            # LoadStatus-Spalte anhängen
+            df_eingehende_lkws_filter = df_eingehende_lkws_filter.copy()
+            df_eingehende_lkws_filter['LoadStatus'] = liste_lkw_status
+            return anzahl_ladesaeulen, ladequote, df_eingehende_lkws_filter
+
+        # Sonst: Anzahl Ladesäulen anpassen und nächsten Durchgang
+        # (Ein Minimalbeispiel, wie in Ihrem Code)
+        if ladequote == 0:
+            # falls gar keine LKW geladen, mindestens +1
+            anzahl_ladesaeulen += 1
+        else:
+            # analog Ihrem bisherigen Ansatz
+            anzahl_ladesaeulen = np.ceil(anzahl_ladesaeulen / ladequote * ladquote_ziel).astype(int)
+            if anzahl_ladesaeulen == 0:
+                anzahl_ladesaeulen = 1
+
+    return anzahl_ladesaeulen, ladequote, None
+
+def konfiguration_ladehub(df_eingehende_lkws, szenario, speichern=True):
+    """
+    Hauptfunktion: Ermittelt pro Lade-Typ (HPC/MCS/NCS), wie viele Ladesäulen
+    benötigt werden, um eine Ziel-Ladequote zu erreichen. Speichert zudem pro
+    LKW, ob er letztlich geladen wurde (LoadStatus).
+    Mit speichern=False wird keine CSV geschrieben (z.B. für Benchmarks).
+    """
+    df_eingehende_lkws_loadstatus = pd.DataFrame()
+
+    # Szenario-Einstellungen parsen
+    cluster, dict_ladequoten = szenario_ladequoten(szenario)
 
     df_anzahl_ladesaeulen = pd.DataFrame(columns=['Cluster','NCS','Ladequote_NCS','HPC','Ladequote_HPC','MCS','Ladequote_MCS'])
 
@@ -109,64 +186,9 @@ def konfiguration_ladehub(df_eingehende_lkws, szenario):
             (df_eingehende_lkws['Wochentag'] <= 7)
         ]
 
-        ankommende_lkws     = len(df_eingehende_lkws_filter)
-        ladequote           = 0
-        anzahl_ladesaeulen  = 1
-
-        # Wiederholung in Schritten bis zur Ziel-Ladequote
-        for durchgang in range(ankommende_lkws):
-            # Graphen via Node-Splitting-Ansatz aufbauen
-            # G, S, T = build_flow_network(df_eingehende_lkws_filter, anzahl_ladesaeulen)
-            flow_dict = build_flow_network(df_eingehende_lkws_filter, anzahl_ladesaeulen)
-
-            # Max-Flow-Min-Cost
-            # flow_dict = nx.max_flow_min_cost(G, S, T)
-
-            # Bestimmen, wie viele LKW tatsächlich geladen wurden
-            lkw_geladen = 0
-            for idx, row in df_eingehende_lkws_filter.iterrows():
-                # Prüfe, ob Fluss über LKW{i}_arr -> LKW{i}_dep > 0
-                lkw_id = row['Nummer']
-                lkw_arr = f"LKW{lkw_id}_arr"
-                lkw_dep = f"LKW{lkw_id}_dep"
-                flow_val = flow_dict.get(lkw_arr, {}).get(lkw_dep, None)
-                if flow_val > 0:
-                    lkw_geladen += 1
-
-            # Ladequote berechnen
-            ladequote = lkw_geladen / ankommende_lkws
-
-            print(f"[{ladetyp}], Ladesäulen={anzahl_ladesaeulen}, Ladequote={ladequote}")
-
-            # Falls Ziel-Ladequote erreicht/überschritten, LoadStatus speichern & Abbruch
-            if ladequote >= ladquote_ziel:
-                liste_lkw_status = []
-                for idx, row in df_eingehende_lkws_filter.iterrows():
-                    lkw_id = row['Nummer']
-                    lkw_arr = f"LKW{lkw_id}_arr"
-                    lkw_dep = f"LKW{lkw_id}_dep"
-                    flow_of_this_truck = flow_dict.get(lkw_arr, {}).get(lkw_dep, 0)
-                    if flow_of_this_truck > 0:
-                        liste_lkw_status.append(1)
-                    else:
-                        liste_lkw_status.append(0)
-
-                # LoadStatus-Spalte anhängen
-                df_eingehende_lkws_filter = df_eingehende_lkws_filter.copy()
-                df_eingehende_lkws_filter['LoadStatus'] = liste_lkw_status
-                df_eingehende_lkws_loadstatus = pd.concat([df_eingehende_lkws_loadstatus, df_eingehende_lkws_filter])
-                break
-
-            # Sonst: Anzahl Ladesäulen anpassen und nächsten Durchgang
-            # (Ein Minimalbeispiel, wie in Ihrem Code)
-            if ladequote == 0:
-                # falls gar keine LKW geladen, mindestens +1
-                anzahl_ladesaeulen += 1
-            else:
-                # analog Ihrem bisherigen Ansatz
-                anzahl_ladesaeulen = np.ceil(anzahl_ladesaeulen / ladequote * ladquote_ziel).astype(int)
-                if anzahl_ladesaeulen == 0:
-                    anzahl_ladesaeulen = 1
+        anzahl_ladesaeulen, ladequote, df_loadstatus = ladesaeulen_ladetyp(df_eingehende_lkws_filter, ladquote_ziel, ladetyp)
+        if df_loadstatus is not None:
+            df_eingehende_lkws_loadstatus = pd.concat([df_eingehende_lkws_loadstatus, df_loadstatus])
 
         # Speichern der Ergebnisse
         df_anzahl_ladesaeulen.loc[0,'Cluster'] = cluster
@@ -174,6 +196,14 @@ def konfiguration_ladehub(df_eingehende_lkws, szenario):
         df_anzahl_ladesaeulen.loc[0,f'Ladequote_{ladetyp}'] = ladequote
     
     
+    if not speichern:
+        return df_anzahl_ladesaeulen, df_eingehende_lkws_loadstatus
+    
+    anzahl_ladesaeulen_speichern(df_anzahl_ladesaeulen, df_eingehende_lkws_loadstatus, szenario)
+    
+    return df_anzahl_ladesaeulen, df_eingehende_lkws_loadstatus
+
+def anzahl_ladesaeulen_speichern(df_anzahl_ladesaeulen, df_eingehende_lkws_loadstatus, szenario):
     # Pfad für Dateien
     path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
     
@@ -188,15 +218,237 @@ def konfiguration_ladehub(df_eingehende_lkws, szenario):
     #     os.path.join(path, 'lkws', f'eingehende_lkws_loadstatus_{szenario}.csv'),
     #     sep=';', decimal=','
     # )
-    
-    return None
+
+def konfiguration_ladehub_batch(df_eingehende_lkws, szenarien, speichern=True, max_workers=None):
+    """
+    Dimensioniert mehrere Szenarien in einem Durchgang. Die LKW werden einmal nach
+    (Cluster, Ladesäule) gruppiert und jede Kombination aus Cluster, Lade-Typ und
+    Ziel-Ladequote wird nur einmal berechnet, auch wenn sich mehrere Szenarien
+    (z.B. Leistungs- oder Netzanschluss-Varianten) diese teilen. Die Gruppen werden
+    parallel in eigenen Prozessen dimensioniert.
+    Rückgabe: Ergebnistabelle mit einer Zeile je Szenario und Lade-Typ sowie
+    ein dict Szenario -> LKW mit LoadStatus.
+    """
+    list_ergebnis = []
+    dict_loadstatus = {}
+    for szenario, df_szenario, df_loadstatus in konfiguration_ladehub_batch_iter(df_eingehende_lkws, szenarien, max_workers):
+        list_ergebnis.append(df_szenario)
+        dict_loadstatus[szenario] = df_loadstatus
+        if speichern:
+            anzahl_ladesaeulen_speichern(anzahl_ladesaeulen_tabelle(df_szenario), df_loadstatus, szenario)
+
+    df_ergebnis = pd.concat(list_ergebnis, ignore_index=True) if list_ergebnis else pd.DataFrame()
+    return df_ergebnis, dict_loadstatus
+
+def konfiguration_ladehub_batch_iter(df_eingehende_lkws, szenarien, max_workers=None):
+    """
+    Wie konfiguration_ladehub_batch, liefert die Szenarien aber einzeln (in der
+    Reihenfolge von szenarien), sobald alle ihre Kombinationen berechnet sind.
+    Die Kombinationen werden in dieser Reihenfolge eingereicht, sodass das erste
+    Szenario nicht auf die Dimensionierung aller übrigen wartet.
+    Liefert je Szenario: (szenario, Ergebniszeilen je Lade-Typ, LKW mit LoadStatus).
+    """
+    df_woche = df_eingehende_lkws[df_eingehende_lkws['Wochentag'] <= 7]
+    gruppen = dict(list(df_woche.groupby(['Cluster', 'Ladesäule'])))
+    keine_lkws = df_woche.iloc[0:0]
+
+    dict_szenarien = {szenario: szenario_ladequoten(szenario) for szenario in szenarien}
+    aufgaben = list(dict.fromkeys(
+        (cluster, ladetyp, ladquote_ziel)
+        for cluster, dict_ladequoten in dict_szenarien.values()
+        for ladetyp, ladquote_ziel in dict_ladequoten.items()
+    ))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            (cluster, ladetyp, ladquote_ziel): executor.submit(
+                ladesaeulen_ladetyp, gruppen.get((cluster, ladetyp), keine_lkws), ladquote_ziel, ladetyp
+            )
+            for cluster, ladetyp, ladquote_ziel in aufgaben
+        }
+
+        for szenario, (cluster, dict_ladequoten) in dict_szenarien.items():
+            zeilen = []
+            list_loadstatus = []
+            for ladetyp, ladquote_ziel in dict_ladequoten.items():
+                anzahl_ladesaeulen, ladequote, df_loadstatus = futures[(cluster, ladetyp, ladquote_ziel)].result()
+                if df_loadstatus is not None:
+                    list_loadstatus.append(df_loadstatus)
+                zeilen.append({
+                    'Szenario': szenario,
+                    'Cluster': cluster,
+                    'Ladetyp': ladetyp,
+                    'Ladequote_Ziel': ladquote_ziel,
+                    'Anzahl_LKW': len(gruppen.get((cluster, ladetyp), keine_lkws)),
+                    'Anzahl_Ladesaeulen': anzahl_ladesaeulen,
+                    'Ladequote': ladequote,
+                })
+            yield szenario, pd.DataFrame(zeilen), pd.concat(list_loadstatus) if list_loadstatus else pd.DataFrame()
+
+def anzahl_ladesaeulen_tabelle(df_szenario):
+    """
+    Wandelt die Zeilen eines Szenarios aus konfiguration_ladehub_batch in das Format
+    von konfiguration_ladehub um: eine Zeile, Spalten je Lade-Typ.
+    """
+    df_anzahl_ladesaeulen = pd.DataFrame(columns=['Cluster','NCS','Ladequote_NCS','HPC','Ladequote_HPC','MCS','Ladequote_MCS'])
+    for _, row in df_szenario.iterrows():
+        df_anzahl_ladesaeulen.loc[0,'Cluster'] = row['Cluster']
+        df_anzahl_ladesaeulen.loc[0,row['Ladetyp']] = row['Anzahl_Ladesaeulen']
+        df_anzahl_ladesaeulen.loc[0,f"Ladequote_{row['Ladetyp']}"] = row['Ladequote']
+    return df_anzahl_ladesaeulen
+
+# -------------------------------------
+# Ladequote-Frontier: geladene LKW je Anzahl Ladesäulen
+# -------------------------------------
+
+def frontier_ladetyp(df_filter, ladetyp=''):
+    """
+    Berechnet für die gefilterten LKW eines Lade-Typs die Anzahl geladener LKW für
+    jede Anzahl Ladesäulen k = 1 .. maximale Gleichzeitigkeit in einem Durchgang.
+    Genutzt wird das Flussnetzwerk aus build_flow_network, gelöst mit sukzessiven
+    kürzesten Augmentierungspfaden: Jeder Pfad entspricht einer weiteren Ladesäule,
+    und nach k Pfaden liegt der kostenminimale Fluss mit Wert k vor (wie
+    nx.max_flow_min_cost mit anzahl_ladesaeulen = k).
+    Rückgabe: DataFrame mit Ladesaeulen, LKW_geladen, Anzahl_LKW, Ladequote.
+    """
+    n = len(df_filter)
+    if n == 0:
+        return pd.DataFrame(columns=['Ladesaeulen', 'LKW_geladen', 'Anzahl_LKW', 'Ladequote'])
+
+    ankunft = (df_filter['Ankunftszeit'] + (df_filter['Wochentag'] - 1) * 1440).to_numpy(dtype=int)
+    abfahrt = ankunft + df_filter['Pausenlaenge'].to_numpy(dtype=int) + 5 # 5 Minuten Wechselzeit
+    start = ankunft.min()
+    anzahl_zeitknoten = (abfahrt.max() - start) // 5 + 1
+
+    # Maximale Gleichzeitigkeit: Abfahrten vor Ankünften zum gleichen Zeitpunkt
+    ereignisse = np.concatenate([np.stack([abfahrt, np.zeros(n, dtype=int)], axis=1), np.stack([ankunft, np.ones(n, dtype=int)], axis=1)])
+    ereignisse = ereignisse[np.lexsort((ereignisse[:, 1], ereignisse[:, 0]))]
+    max_gleichzeitig = np.cumsum(np.where(ereignisse[:, 1] == 1, 1, -1)).max()
+
+    # Knoten: Zeitknoten 0..M-1, LKW_arr M..M+n-1, LKW_dep M+n..M+2n-1, S, T
+    M = anzahl_zeitknoten
+    S = M + 2 * n
+    T = S + 1
+    kopf, kapazitaet, kosten, nachbarn = [], [], [], [[] for _ in range(T + 1)]
+
+    def kante(u, v, cap, cost):
+        nachbarn[u].append(len(kopf))
+        kopf.append(v); kapazitaet.append(cap); kosten.append(cost)
+        nachbarn[v].append(len(kopf))
+        kopf.append(u); kapazitaet.append(0); kosten.append(-cost)
+        return len(kopf) - 2
+
+    kante(S, 0, n, 0)
+    kante(M - 1, T, n, 0)
+    for i in range(M - 1):
+        kante(i, i + 1, n, 10)
+    kanten_lkw = []
+    for j in range(n):
+        kante((ankunft[j] - start) // 5, M + j, 1, 0)
+        kanten_lkw.append(kante(M + j, M + n + j, 1, 0))
+        kante(M + n + j, (abfahrt[j] - start) // 5, 1, 0)
+
+    # Sukzessive kürzeste Wege (Dijkstra mit Potentialen, alle Kosten >= 0)
+    potential = [0] * (T + 1)
+    zeilen = []
+    for k in range(1, max_gleichzeitig + 1):
+        distanz = [float('inf')] * (T + 1)
+        vorgaenger = [-1] * (T + 1)
+        distanz[S] = 0
+        heap = [(0, S)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > distanz[u]:
+                continue
+            for e in nachbarn[u]:
+                if kapazitaet[e] <= 0:
+                    continue
+                v = kopf[e]
+                d_neu = d + kosten[e] + potential[u] - potential[v]
+                if d_neu < distanz[v]:
+                    distanz[v] = d_neu
+                    vorgaenger[v] = e
+                    heapq.heappush(heap, (d_neu, v))
+        if distanz[T] == float('inf'):
+            break
+        for v in range(T + 1):
+            if distanz[v] < float('inf'):
+                potential[v] += distanz[v]
+
+        # Eine Einheit entlang des Pfads schicken (= eine weitere Ladesäule)
+        v = T
+        while v != S:
+            e = vorgaenger[v]
+            kapazitaet[e] -= 1
+            kapazitaet[e ^ 1] += 1
+            v = kopf[e ^ 1]
+
+        lkw_geladen = sum(1 - kapazitaet[e] for e in kanten_lkw)
+        print(f"[{ladetyp}], Ladesäulen={k}, Ladequote={lkw_geladen / n}")
+        zeilen.append({'Ladesaeulen': k, 'LKW_geladen': lkw_geladen, 'Anzahl_LKW': n, 'Ladequote': lkw_geladen / n})
+
+    return pd.DataFrame(zeilen)
+
+def ladequote_frontier(df_eingehende_lkws, cluster_liste, speichern=True, max_workers=None):
+    """
+    Berechnet die Frontier (geladene LKW je Anzahl Ladesäulen) für alle Lade-Typen
+    der angegebenen Cluster parallel und speichert sie einmalig als CSV, sodass
+    jede Ziel-Ladequote ohne erneute Dimensionierung nachgeschlagen werden kann.
+    """
+    df_woche = df_eingehende_lkws[
+        (df_eingehende_lkws['Cluster'].isin(cluster_liste)) &
+        (df_eingehende_lkws['Wochentag'] <= 7)
+    ]
+    gruppen = dict(list(df_woche.groupby(['Cluster', 'Ladesäule'])))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {gruppe: executor.submit(frontier_ladetyp, df_gruppe, gruppe[1]) for gruppe, df_gruppe in gruppen.items()}
+        list_frontier = []
+        for (cluster, ladetyp), future in futures.items():
+            df_frontier = future.result()
+            df_frontier.insert(0, 'Ladetyp', ladetyp)
+            df_frontier.insert(0, 'Cluster', cluster)
+            list_frontier.append(df_frontier)
+
+    df_frontier = pd.concat(list_frontier, ignore_index=True)
+
+    if speichern:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+        for cluster, df_cluster in df_frontier.groupby('Cluster'):
+            df_cluster.to_csv(
+                os.path.join(path, 'konfiguration_ladehub', f'ladequote_frontier_cl_{cluster}.csv'),
+                sep=';', decimal=',', index=False
+            )
+
+    return df_frontier
+
+def ladesaeulen_aus_frontier(df_frontier, szenario):
+    """
+    Schlägt für ein Szenario die kleinste Anzahl Ladesäulen je Lade-Typ nach, mit
+    der die Ziel-Ladequote erreicht wird. Rückgabe im Format von konfiguration_ladehub.
+    """
+    cluster, dict_ladequoten = szenario_ladequoten(szenario)
+    df_anzahl_ladesaeulen = pd.DataFrame(columns=['Cluster','NCS','Ladequote_NCS','HPC','Ladequote_HPC','MCS','Ladequote_MCS'])
+    for ladetyp, ladquote_ziel in dict_ladequoten.items():
+        df_typ = df_frontier[(df_frontier['Cluster'] == cluster) & (df_frontier['Ladetyp'] == ladetyp)]
+        df_erreicht = df_typ[df_typ['Ladequote'] >= ladquote_ziel]
+        if len(df_erreicht) > 0:
+            zeile = df_erreicht.iloc[0]
+        elif len(df_typ) > 0:
+            zeile = df_typ.iloc[-1]
+        else:
+            zeile = {'Ladesaeulen': 1, 'Ladequote': 0}
+        df_anzahl_ladesaeulen.loc[0,'Cluster'] = cluster
+        df_anzahl_ladesaeulen.loc[0,ladetyp] = int(zeile['Ladesaeulen'])
+        df_anzahl_ladesaeulen.loc[0,f'Ladequote_{ladetyp}'] = zeile['Ladequote']
+    return df_anzahl_ladesaeulen
 
 def main():
     df_eingehende_lkws = datenimport()
     
-    for szenario in config.list_szenarien:
-        print(f"Konfiguration Hub: {szenario}")
-        konfiguration_ladehub(df_eingehende_lkws, szenario)
+    print(f"Konfiguration Hub: {len(config.list_szenarien)} Szenarien")
+    df_ergebnis, _ = konfiguration_ladehub_batch(df_eingehende_lkws, config.list_szenarien)
+    print(df_ergebnis)
 
 # -------------------------------------
 # Hauptaufruf
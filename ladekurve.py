@@ -0,0 +1,117 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# ======================================================
+# Ladekurve LKW und vorberechnete Ladetabellen
+# ======================================================
+
+# Maximale Ladeleistung des LKW [kW] in Abhängigkeit vom SOC (stückweise linear)
+XVALS = [0.0, 0.5, 0.5, 0.8, 0.8, 1.0]
+YVALS = [1000, 1000, 800, 800, 500, 500]
+
+# Sprungstellen der Ladekurve: (SOC, Leistung davor, Leistung danach)
+SPRUNGSTELLEN = [(XVALS[k], YVALS[k], YVALS[k + 1]) for k in range(len(XVALS) - 1) if XVALS[k] == XVALS[k + 1]]
+
+Ladetabelle = namedtuple('Ladetabelle', ['kapazitaet', 'ladeleistung', 'schritt', 'soc'])
+
+
+def max_leistung(soc):
+    """
+    Maximale Ladeleistung des LKW laut Ladekurve (vektorisiert). An den Sprungstellen
+    gilt der niedrigere Wert.
+    """
+    return np.interp(soc, XVALS, YVALS)
+
+
+@lru_cache(maxsize=None)
+def ladetabelle(kapazitaet, ladeleistung, schritt=5):
+    """
+    Simuliert das Laden von SOC 0 bis 1 mit der jeweils maximal möglichen Leistung
+    min(ladeleistung, Ladekurve(SOC)) in Zeitschritten von schritt Minuten.
+    soc[n] ist der SOC nach n Schritten; da die Ladekurve nur vom SOC abhängt,
+    entspricht ein Start bei SOC s dem Einstieg in diese Trajektorie bei s.
+    Die Tabellen werden je (Kapazität, Ladeleistung, Schritt) nur einmal berechnet.
+    """
+    kapazitaet = float(kapazitaet)
+    ladeleistung = float(ladeleistung)
+    liste_soc = [0.0]
+    while liste_soc[-1] < 1:
+        leistung = min(ladeleistung, max_leistung(liste_soc[-1]))
+        liste_soc.append(liste_soc[-1] + leistung * schritt / 60 / kapazitaet)
+
+    soc = np.array(liste_soc)
+    soc.flags.writeable = False
+    return Ladetabelle(kapazitaet, ladeleistung, schritt, soc)
+
+
+def schritte_bei_soc(tabelle, soc):
+    """
+    Position (in Schritten, gebrochen) eines SOC auf der Ladetrajektorie.
+    """
+    return np.interp(soc, tabelle.soc, np.arange(len(tabelle.soc)))
+
+
+def zeit_bis_soc(tabelle, soc_start, soc_ziel):
+    """
+    Ladezeit in Minuten (auf volle Schritte aufgerundet), um von soc_start auf
+    soc_ziel zu laden.
+    """
+    schritte = schritte_bei_soc(tabelle, soc_ziel) - schritte_bei_soc(tabelle, soc_start)
+    return np.maximum(np.ceil(schritte - 1e-9), 0) * tabelle.schritt
+
+
+def soc_nach_schritten(tabelle, soc_start, schritte):
+    """
+    SOC nach schritte Zeitschritten Laden mit maximaler Leistung ab soc_start (höchstens 1).
+    """
+    position = schritte_bei_soc(tabelle, soc_start) + np.asarray(schritte)
+    return np.minimum(np.interp(position, np.arange(len(tabelle.soc)), tabelle.soc), 1)
+
+
+def energie_im_fenster(tabelle, soc_start, schritte):
+    """
+    Maximal ladbare Energie in kWh innerhalb von schritte Zeitschritten ab soc_start.
+    """
+    return (soc_nach_schritten(tabelle, soc_start, schritte) - soc_start) * tabelle.kapazitaet
+
+
+def energie_obergrenze(kapazitaet, ladeleistung, soc_start, schritte, soc_min=None, schritt=5):
+    """
+    Exakte Höchstenergie in kWh innerhalb von schritte Zeitschritten (vektorisiert).
+    Laden mit maximaler Leistung ist nicht immer optimal: An einer Sprungstelle
+    fällt die Ladekurve, und ein SOC genau auf der Sprungstelle darf im Modell
+    noch mit der höheren Leistung laden. Der erreichbare SOC nach k Schritten ist
+    ein Intervall [soc_min, M_k]; M_k+1 ist das Maximum von SOC plus Schrittenergie
+    über dieses Intervall, das bei M_k oder bei einer Sprungstelle liegt.
+    soc_min: niedrigster erreichbarer SOC (soc_start, bei Entladen z.B. 0).
+    """
+    kapazitaet, ladeleistung, soc_start, schritte = np.broadcast_arrays(
+        np.asarray(kapazitaet, dtype=float), np.asarray(ladeleistung, dtype=float),
+        np.asarray(soc_start, dtype=float), np.asarray(schritte)
+    )
+    soc_min = soc_start if soc_min is None else np.broadcast_to(np.asarray(soc_min, dtype=float), soc_start.shape)
+    faktor = schritt / 60 / kapazitaet
+
+    soc_max = soc_start.copy()
+    for k in range(int(schritte.max(initial=0))):
+        neu = soc_max + np.minimum(ladeleistung, max_leistung(soc_max)) * faktor
+        for soc_sprung, leistung_davor, _ in SPRUNGSTELLEN:
+            erreichbar = (soc_min <= soc_sprung) & (soc_sprung <= soc_max)
+            neu = np.where(erreichbar, np.maximum(neu, soc_sprung + np.minimum(ladeleistung, leistung_davor) * faktor), neu)
+        soc_max = np.where(k < schritte, np.minimum(neu, 1), soc_max)
+    return (soc_max - soc_start) * kapazitaet
+
+
+def sprung_im_bereich(ladeleistung, soc_von, soc_bis):
+    """
+    True, wo zwischen soc_von (einschließlich) und soc_bis (ausschließlich) eine
+    Sprungstelle liegt, die bei dieser Säulenleistung wirkt (Säule stärker als
+    die Leistung nach dem Sprung).
+    """
+    ladeleistung = np.asarray(ladeleistung, dtype=float)
+    sprung = np.zeros(np.broadcast(ladeleistung, soc_von, soc_bis).shape, dtype=bool)
+    for soc_sprung, _, leistung_danach in SPRUNGSTELLEN:
+        sprung |= (ladeleistung > leistung_danach) & (soc_von <= soc_sprung) & (soc_sprung < soc_bis)
+    return sprung
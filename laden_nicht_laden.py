@@ -97,11 +97,28 @@ def max_truck_assignment(arrival_times, departure_times, num_stations):
     
     return ladestatus
 
-def main():
+def ladestatus_zuweisen(df_eingehende_lkws, anzahl, cluster=2):
+    """
+    Weist je Ladetyp die LKW eines Clusters den vorhandenen Ladesäulen zu
+    (max_truck_assignment). Rückgabe: LKW mit Spalte LoadStatus.
+    """
     df_lkws = pd.DataFrame()
     
     ladetypen = ['HPC', 'MCS', 'NCS']
     
+    for ladetyp in ladetypen:
+        print(f"Ladetyp: {ladetyp}")
+        df_ladetyp = df_eingehende_lkws[(df_eingehende_lkws['Cluster'] == cluster) & (df_eingehende_lkws['Ladesäule'] == ladetyp)][:]
+        arrival_times = df_ladetyp['Ankunftszeit_total'].tolist()
+        departure_times = (df_ladetyp['Ankunftszeit_total'] + df_ladetyp['Pausenlaenge']).tolist()
+        print(f"Anzahl LKWs: {len(arrival_times)}")
+        ladestatus = max_truck_assignment(arrival_times, departure_times, anzahl[ladetyp])
+        df_ladetyp['LoadStatus'] = ladestatus
+        df_lkws = pd.concat([df_lkws, df_ladetyp])
+    
+    return df_lkws
+
+def main():
     list_szenarien = config.list_szenarien
     szenario = list_szenarien[0]
     
@@ -114,18 +131,9 @@ def main():
         'MCS': df_anzahl_ladesaeulen.loc[0, 'MCS']
     }
     
-    for ladetyp in ladetypen:
-        print(f"Ladetyp: {ladetyp}")
-        df_eingehende_lkws = pd.read_csv(os.path.join(path,'lkw_eingehend', 'eingehende_lkws_ladesaeule.csv'), sep=';', decimal=',', index_col=0)
-        df_eingehende_lkws = df_eingehende_lkws[(df_eingehende_lkws['Cluster'] == 2) & (df_eingehende_lkws['Ladesäule'] == ladetyp)][:]
-        arrival_times = df_eingehende_lkws['Ankunftszeit_total'].tolist()
-        departure_times = (df_eingehende_lkws['Ankunftszeit_total'] + df_eingehende_lkws['Pausenlaenge']).tolist()
-        print(f"Anzahl LKWs: {len(arrival_times)}")
-        ladestatus = max_truck_assignment(arrival_times, departure_times, anzahl[ladetyp])
-        df_eingehende_lkws['LoadStatus'] = ladestatus
-        df_lkws = pd.concat([df_lkws, df_eingehende_lkws])
+    df_eingehende_lkws = pd.read_csv(os.path.join(path,'lkw_eingehend', 'eingehende_lkws_ladesaeule.csv'), sep=';', decimal=',', index_col=0)
+    df_lkws = ladestatus_zuweisen(df_eingehende_lkws, anzahl)
         
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
     df_lkws.to_csv(os.path.join(path, 'lkws', f'eingehende_lkws_loadstatus_{szenario}.csv'), sep=';', decimal=',')    
         
 
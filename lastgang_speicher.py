@@ -0,0 +1,202 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# Memory-mapped Speicher für Lastgänge im 5-Minuten-Raster
+# ======================================================
+#
+# Aufbau eines Speichers data/lastgang_speicher/<name>/:
+#   meta.json        Szenarien, Strategien, Anzahl Zeitschritte, Schrittweite
+#   hub.npy          float32 (Szenario, Strategie, Zeitschritt): Leistung des Hubs
+#   lkw_index.npy    strukturiert, ein Eintrag je LKW-Ladevorgang
+#                    (szenario, strategie, lkw_id, ladetyp, start)
+#   lkw_offsets.npy  int64, Länge n+1: Ladevorgang k liegt in [offsets[k], offsets[k+1])
+#   lkw_leistung.npy float32, flaches Array aller LKW-Leistungen
+#   lkw_soc.npy      float32, flaches Array aller LKW-SOC-Werte
+#
+# Alle .npy-Dateien werden mit mmap_mode='r' geöffnet, sodass nur die
+# angefragten Ausschnitte von der Platte gelesen werden.
+
+SCHRITTWEITE = 5  # Minuten
+LADETYPEN = ['NCS', 'HPC', 'MCS']
+DTYPE_INDEX = np.dtype([
+    ('szenario', np.int32),
+    ('strategie', np.int32),
+    ('lkw_id', np.int64),
+    ('ladetyp', np.int8),
+    ('start', np.int64),
+])
+
+
+def speicher_pfad(name):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'lastgang_speicher', name)
+
+
+def lkw_ragged(df_lkw_lastgang):
+    """
+    Wandelt df_lkw_lastgang (eine Zeile je LKW und Zeitschritt) in Ragged-Arrays um.
+    Rückgabe: lkw_id, ladetyp, start (Zeitschritt), laengen, leistung, soc.
+    """
+    df = df_lkw_lastgang.sort_values(by=['LKW_ID', 'Zeit'])
+    lkw_id = df['LKW_ID'].to_numpy()
+    neu = np.empty(len(df), dtype=bool)
+    neu[:1] = True
+    neu[1:] = lkw_id[1:] != lkw_id[:-1]
+    anfang = np.flatnonzero(neu)
+
+    return (
+        lkw_id[anfang].astype(np.int64),
+        np.array([LADETYPEN.index(typ) for typ in df['Ladetyp'].to_numpy()[anfang]], dtype=np.int8),
+        df['Zeit'].to_numpy()[anfang].astype(np.int64) // SCHRITTWEITE,
+        np.diff(np.append(anfang, len(df))),
+        pd.to_numeric(df['Leistung'], errors='coerce').to_numpy(dtype=np.float32),
+        pd.to_numeric(df['SOC'], errors='coerce').to_numpy(dtype=np.float32),
+    )
+
+
+def speichern(name, ergebnisse):
+    """
+    Schreibt Ergebnisse in einen Speicher. ergebnisse ist eine Liste von
+    (szenario, strategie, df_lkw_lastgang, df_lastgang) wie von
+    epex_optimierung.modellierung_epex geliefert.
+    """
+    path = speicher_pfad(name)
+    os.makedirs(path, exist_ok=True)
+
+    szenarien = list(dict.fromkeys(e[0] for e in ergebnisse))
+    strategien = list(dict.fromkeys(e[1] for e in ergebnisse))
+    anzahl_schritte = max(len(e[3]) for e in ergebnisse)
+
+    hub = np.lib.format.open_memmap(
+        os.path.join(path, 'hub.npy'), mode='w+', dtype=np.float32,
+        shape=(len(szenarien), len(strategien), anzahl_schritte)
+    )
+    hub[:] = 0
+
+    list_index, list_laengen, list_leistung, list_soc = [], [], [], []
+    for szenario, strategie, df_lkw_lastgang, df_lastgang in ergebnisse:
+        s, k = szenarien.index(szenario), strategien.index(strategie)
+        hub[s, k, :len(df_lastgang)] = df_lastgang['Leistung'].to_numpy(dtype=np.float32)
+
+        lkw_id, ladetyp, start, laengen, leistung, soc = lkw_ragged(df_lkw_lastgang)
+        index = np.empty(len(lkw_id), dtype=DTYPE_INDEX)
+        index['szenario'] = s
+        index['strategie'] = k
+        index['lkw_id'] = lkw_id
+        index['ladetyp'] = ladetyp
+        index['start'] = start
+        list_index.append(index)
+        list_laengen.append(laengen)
+        list_leistung.append(leistung)
+        list_soc.append(soc)
+    hub.flush()
+    del hub
+
+    offsets = np.zeros(sum(len(l) for l in list_laengen) + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(list_laengen), out=offsets[1:])
+    np.save(os.path.join(path, 'lkw_index.npy'), np.concatenate(list_index))
+    np.save(os.path.join(path, 'lkw_offsets.npy'), offsets)
+    np.save(os.path.join(path, 'lkw_leistung.npy'), np.concatenate(list_leistung))
+    np.save(os.path.join(path, 'lkw_soc.npy'), np.concatenate(list_soc))
+
+    meta = {
+        'szenarien': szenarien,
+        'strategien': strategien,
+        'anzahl_schritte': anzahl_schritte,
+        'schrittweite_min': SCHRITTWEITE,
+        'ladetypen': LADETYPEN,
+        'einheit_leistung': 'kW',
+    }
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    print(f"Lastgang-Speicher geschrieben: {path}")
+    return path
+
+
+def oeffnen(name):
+    """
+    Öffnet einen Speicher schreibgeschützt als Memory-Map.
+    Rückgabe: dict mit 'meta', 'hub', 'lkw_index', 'lkw_offsets', 'lkw_leistung', 'lkw_soc'.
+    """
+    path = speicher_pfad(name)
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        speicher = {'meta': json.load(f)}
+    for key in ['hub', 'lkw_index', 'lkw_offsets', 'lkw_leistung', 'lkw_soc']:
+        speicher[key] = np.load(os.path.join(path, f'{key}.npy'), mmap_mode='r')
+    return speicher
+
+
+def hub_lastgang(speicher, szenario, strategie, von=0, bis=None):
+    """
+    Leistung des Hubs zwischen den Minuten von und bis (ausschließlich).
+    """
+    s = speicher['meta']['szenarien'].index(szenario)
+    k = speicher['meta']['strategien'].index(strategie)
+    bis = None if bis is None else bis // SCHRITTWEITE
+    return speicher['hub'][s, k, von // SCHRITTWEITE:bis]
+
+
+def lkw_lastgang(speicher, szenario, strategie, lkw_id):
+    """
+    Lastgang eines LKW im Schema von df_lkw_lastgang (Zeit, Leistung, SOC).
+    Liest nur den Ausschnitt des LKW aus den flachen Arrays.
+    """
+    s = speicher['meta']['szenarien'].index(szenario)
+    k = speicher['meta']['strategien'].index(strategie)
+    index = speicher['lkw_index']
+    treffer = np.flatnonzero((index['szenario'] == s) & (index['strategie'] == k) & (index['lkw_id'] == lkw_id))
+
+    list_df = []
+    for j in treffer:
+        von, bis = speicher['lkw_offsets'][j], speicher['lkw_offsets'][j + 1]
+        list_df.append(pd.DataFrame({
+            'LKW_ID': lkw_id,
+            'Ladetyp': speicher['meta']['ladetypen'][index['ladetyp'][j]],
+            'Zeit': (index['start'][j] + np.arange(bis - von)) * SCHRITTWEITE,
+            'Leistung': speicher['lkw_leistung'][von:bis],
+            'SOC': speicher['lkw_soc'][von:bis],
+        }))
+    return pd.concat(list_df, ignore_index=True) if list_df else pd.DataFrame()
+
+
+def aus_csv(name, szenarien):
+    """
+    Baut einen Speicher aus den CSV-Ausgaben von epex_optimierung.main auf.
+    Jede CSV enthält genau ein Szenario (alle Strategien); mit vergleichen
+    lässt sich prüfen, dass das Ergebnis dem direkt gespeicherten entspricht.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    ergebnisse = []
+    for szenario in szenarien:
+        df_lkw_lastgang = pd.read_csv(os.path.join(path, 'lastgang_lkw_epex', f'lastgang_lkw_{szenario}.csv'), sep=';', decimal=',')
+        df_lastgang = pd.read_csv(os.path.join(path, 'lastgang_epex', f'lastgang_{szenario}.csv'), sep=';', decimal=',', index_col=0)
+        for strategie in df_lkw_lastgang['Strategie'].unique():
+            ergebnisse.append((
+                szenario, strategie,
+                df_lkw_lastgang[df_lkw_lastgang['Strategie'] == strategie],
+                df_lastgang[df_lastgang['Strategie'] == strategie],
+            ))
+    return speichern(name, ergebnisse)
+
+
+def vergleichen(name_a, name_b, toleranz=1e-4):
+    """
+    Prüft, ob zwei Speicher dieselben Lastgänge enthalten, z.B. einen von
+    epex_optimierung.main geschriebenen und einen mit aus_csv neu aufgebauten.
+    Gibt die Liste der Abweichungen zurück (leer, wenn gleich).
+    """
+    a, b = oeffnen(name_a), oeffnen(name_b)
+    abweichungen = [f"meta['{key}']" for key in a['meta'] if a['meta'][key] != b['meta'].get(key)]
+    if abweichungen:
+        return abweichungen
+
+    for key in ['lkw_index', 'lkw_offsets']:
+        if a[key].shape != b[key].shape or not (a[key] == b[key]).all():
+            abweichungen.append(key)
+    for key in ['hub', 'lkw_leistung', 'lkw_soc']:
+        if a[key].shape != b[key].shape or not np.allclose(a[key], b[key], atol=toleranz, equal_nan=True):
+            abweichungen.append(key)
+    return abweichungen
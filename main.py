@@ -1,20 +1,96 @@
 import time
-import zuweisung_ladetyp
-import laden_nicht_laden
-import konfiguration_ladehub
-import epex_optimierung
-
 
 time_start = time.time()
 
-# zuweisung_ladetyp.main()
-konfiguration_ladehub.main()
-laden_nicht_laden.main()
+import argparse
+import sys
+
+# ======================================================
+# Einstiegspunkt der Pipeline
+# ======================================================
+#
+# Die Stufen-Module werden erst im jeweiligen Unterbefehl importiert, sodass
+# ein einzelner Schritt nur seine eigenen Abhängigkeiten lädt (z.B. 'size'
+# kein gurobipy, 'optimize' kein networkx).
+
+SCHWERE_MODULE = ['gurobipy', 'networkx', 'matplotlib', 'pandas']
+
+
+def startzeit_berichten():
+    """
+    Zeit vom Programmstart bis hier (Interpreter-Argumente und Importe) sowie
+    die bereits geladenen schweren Abhängigkeiten.
+    """
+    geladen = [modul for modul in SCHWERE_MODULE if modul in sys.modules]
+    print(f"Startzeit: {time.time() - time_start:.2f} Sekunden (geladen: {', '.join(geladen) or '-'})")
+
+
+def generate(args):
+    import zuweisung_ladetyp
+    startzeit_berichten()
+    zuweisung_ladetyp.main()
+
+
+def size(args):
+    import konfiguration_ladehub
+    startzeit_berichten()
+    konfiguration_ladehub.main()
+
+
+def assign(args):
+    import laden_nicht_laden
+    startzeit_berichten()
+    laden_nicht_laden.main()
+
+
+def optimize(args):
+    if args.heuristik:
+        import epex_heuristik as modul
+    else:
+        import epex_optimierung as modul
+    startzeit_berichten()
+    modul.main()
+
+
+def sweep(args):
+    import pipeline_async
+    startzeit_berichten()
+    pipeline_async.main(args.stufen, args.max_vorrat, args.max_schreiben)
+
+
+def parser_erstellen():
+    parser = argparse.ArgumentParser(description="Pipeline Ladehub: LKW erzeugen, Hub dimensionieren, LKW zuweisen, Laden optimieren.")
+    befehle = parser.add_subparsers(dest='befehl')
+
+    befehle.add_parser('generate', help="LKW erzeugen und Ladetyp zuweisen (zuweisung_ladetyp)").set_defaults(funktion=generate)
+    befehle.add_parser('size', help="Anzahl Ladesäulen je Szenario bestimmen (konfiguration_ladehub)").set_defaults(funktion=size)
+    befehle.add_parser('assign', help="LKW den Ladesäulen zuweisen (laden_nicht_laden)").set_defaults(funktion=assign)
+
+    p_optimize = befehle.add_parser('optimize', help="Ladevorgänge optimieren (epex_optimierung)")
+    p_optimize.add_argument('--heuristik', action='store_true', help="Heuristischer Dispatcher statt MIP (epex_heuristik)")
+    p_optimize.set_defaults(funktion=optimize)
+
+    p_sweep = befehle.add_parser('sweep', help="Stufen für alle Szenarien aus config mit überlappendem I/O (pipeline_async)")
+    p_sweep.add_argument('--stufen', nargs='+', default=['konfiguration', 'zuweisung', 'epex'],
+                         choices=['konfiguration', 'zuweisung', 'epex'], help="Zusammenhängende Folge von Stufen")
+    p_sweep.add_argument('--max-vorrat', type=int, default=1, help="Maximal vorgeladene Szenarien")
+    p_sweep.add_argument('--max-schreiben', type=int, default=2, help="Maximal ungeschriebene Ergebnisse")
+    p_sweep.set_defaults(funktion=sweep)
+    return parser
+
 
+def main(argv=None):
+    args = parser_erstellen().parse_args(argv)
 
+    if args.befehl is None:
+        # Bisheriges Verhalten: Hub dimensionieren, dann LKW zuweisen
+        size(args)
+        assign(args)
+    else:
+        args.funktion(args)
 
-time_end = time.time()
-print(f'Laufzeit: {time_end - time_start} Sekunden')
+    print(f'Laufzeit: {time.time() - time_start} Sekunden')
 
 
-# Maximale Laufzeit: 
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import config
+import konfiguration_ladehub
+
+# ======================================================
+# Asynchrone Pipeline: Einlesen, Rechnen und Schreiben überlappen
+# ======================================================
+#
+# Ablauf je Szenario: konfiguration (Ladehub dimensionieren) -> zuweisung
+# (LoadStatus je LKW) -> epex (Ladeoptimierung je Strategie). Die Stufen
+# selbst bleiben unverändert, die Pipeline ordnet nur ihre Ein- und Ausgaben:
+# - Die Dimensionierung läuft gebündelt für alle Szenarien in eigenen Prozessen
+#   (konfiguration_ladehub_batch_iter); der Produzent reiht jedes Szenario ein,
+#   sobald seine Kombinationen berechnet sind. Zuweisung und EPEX-Optimierung des
+#   ersten Szenarios laufen so bereits, während die übrigen dimensioniert werden.
+# - Beginnt die Pipeline später, liest der Produzent die Eingaben des nächsten
+#   Szenarios in einem eigenen Thread, während das aktuelle Szenario gerechnet wird.
+# - Ergebnisse werden im Hintergrund geschrieben; die Rechnung wartet nicht darauf.
+#   Nach dem letzten Szenario wird wie in epex_optimierung.main der Lastgang-Speicher
+#   'epex' aufgebaut (aus den geschriebenen CSV, lastgang_speicher.aus_csv).
+# - Backpressure: höchstens max_vorrat Szenarien liegen eingelesen in der
+#   Warteschlange und höchstens max_schreiben Ergebnisse warten aufs Schreiben.
+# laden_nicht_laden und epex_optimierung (gurobipy) werden erst in ihrer Stufe
+# importiert, damit z.B. ein reiner Konfigurationslauf keinen Solver lädt.
+
+STUFEN = ['konfiguration', 'zuweisung', 'epex']
+STRATEGIEN = ['epex', 'Tmin']
+
+
+def data_pfad(*teile):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', *teile)
+
+
+def log(startzeit, text):
+    print(f"[{time.time() - startzeit:8.1f} s] {text}")
+
+
+# --------------------------------------------------
+# Einlesen (läuft im Lese-Thread)
+# --------------------------------------------------
+
+def gemeinsame_eingaben(stufen):
+    """
+    Eingaben, die alle Szenarien teilen und daher nur einmal gelesen werden.
+    """
+    gemeinsam = {}
+    if stufen[0] in ('konfiguration', 'zuweisung'):
+        gemeinsam['df_eingehende_lkws'] = konfiguration_ladehub.datenimport()
+    if 'epex' in stufen and stufen[0] != 'epex':
+        path = os.path.dirname(os.path.abspath(__file__))
+        gemeinsam['df_epex'] = pd.read_csv(os.path.join(path, 'input', 'epex_week.csv'), sep=';', decimal=',', index_col=0)
+    return gemeinsam
+
+
+def szenario_eingaben(szenario, stufen, gemeinsam):
+    """
+    Eingaben eines Szenarios, wenn die Pipeline nach der Dimensionierung beginnt:
+    die Zwischenergebnisse der vorherigen Stufen von der Platte.
+    """
+    daten = {}
+    if stufen[0] == 'zuweisung':
+        daten['df_anzahl_ladesaeulen'] = pd.read_csv(data_pfad('konfiguration_ladehub', f'anzahl_ladesaeulen_{szenario}.csv'), sep=';', decimal=',', index_col=0)
+    elif stufen[0] == 'epex':
+        import epex_optimierung
+        daten['df_epex'], daten['df_lkw'], daten['df_anzahl_ladesaeulen'] = epex_optimierung.datenimport(szenario)
+    return daten
+
+
+# --------------------------------------------------
+# Schreiben (läuft in den Schreib-Threads)
+# --------------------------------------------------
+
+def lkws_speichern(df_lkws, szenario):
+    df_lkws.to_csv(data_pfad('lkws', f'eingehende_lkws_loadstatus_{szenario}.csv'), sep=';', decimal=',')
+
+
+def lastgang_speichern(ergebnisse, szenario):
+    """
+    Schreibt die Lastgänge aller Strategien eines Szenarios im Format von epex_optimierung.main.
+    """
+    df_lkw_lastgang = pd.concat([df.assign(Strategie=strategie) for strategie, df, _ in ergebnisse])
+    df_lastgang = pd.concat([df.assign(Strategie=strategie) for strategie, _, df in ergebnisse])
+    df_lkw_lastgang.to_csv(data_pfad('lastgang_lkw_epex', f'lastgang_lkw_{szenario}.csv'), sep=';', decimal=',', index=False)
+    df_lastgang.to_csv(data_pfad('lastgang_epex', f'lastgang_{szenario}.csv'), sep=';', decimal=',', index=True)
+
+
+# --------------------------------------------------
+# Pipeline
+# --------------------------------------------------
+
+async def produzent(szenarien, stufen, gemeinsam, warteschlange, lese_executor, startzeit):
+    loop = asyncio.get_running_loop()
+    if stufen[0] == 'konfiguration':
+        # Gemeinsame (Cluster, Lade-Typ, Ziel-Ladequote)-Kombinationen nur einmal
+        # dimensionieren; jedes Szenario einreihen, sobald es fertig ist
+        batch = konfiguration_ladehub.konfiguration_ladehub_batch_iter(gemeinsam['df_eingehende_lkws'], szenarien)
+        try:
+            while (ergebnis := await loop.run_in_executor(lese_executor, next, batch, None)) is not None:
+                szenario, df_szenario, df_loadstatus = ergebnis
+                daten = {
+                    'df_anzahl_ladesaeulen': konfiguration_ladehub.anzahl_ladesaeulen_tabelle(df_szenario),
+                    'df_loadstatus': df_loadstatus,
+                }
+                log(startzeit, f"Konfiguration fertig: {szenario}")
+                # Blockiert, solange max_vorrat Szenarien auf die Rechnung warten
+                await warteschlange.put((szenario, daten))
+        finally:
+            await loop.run_in_executor(lese_executor, batch.close)
+    else:
+        for szenario in szenarien:
+            daten = await loop.run_in_executor(lese_executor, szenario_eingaben, szenario, stufen, gemeinsam)
+            log(startzeit, f"Eingaben gelesen: {szenario}")
+            await warteschlange.put((szenario, daten))
+    await warteschlange.put(None)
+
+
+async def szenario_rechnen(szenario, daten, stufen, gemeinsam, schreiben, rechen_executor, startzeit):
+    """
+    Führt die Stufen für ein Szenario nacheinander im Rechen-Thread aus und
+    übergibt jede Ausgabe sofort an das Schreiben im Hintergrund.
+    """
+    loop = asyncio.get_running_loop()
+    df_anzahl_ladesaeulen = daten.get('df_anzahl_ladesaeulen')
+    df_lkw = daten.get('df_lkw')
+    cluster, _ = konfiguration_ladehub.szenario_ladequoten(szenario)
+
+    if 'konfiguration' in stufen:
+        # Bereits im Produzenten dimensioniert, hier nur speichern
+        await schreiben(konfiguration_ladehub.anzahl_ladesaeulen_speichern, df_anzahl_ladesaeulen, daten['df_loadstatus'], szenario)
+
+    if 'zuweisung' in stufen:
+        import laden_nicht_laden
+        anzahl = {typ: int(df_anzahl_ladesaeulen.loc[0, typ]) for typ in ['NCS', 'HPC', 'MCS']}
+        df_lkw = await loop.run_in_executor(
+            rechen_executor, laden_nicht_laden.ladestatus_zuweisen, gemeinsam['df_eingehende_lkws'], anzahl, cluster
+        )
+        log(startzeit, f"Zuweisung fertig: {szenario}")
+        await schreiben(lkws_speichern, df_lkw, szenario)
+        # Gleiche Aufbereitung wie epex_optimierung.datenimport
+        df_lkw = df_lkw.sort_values(by=['Ankunftszeit_total']).reset_index(drop=True)
+
+    if 'epex' in stufen:
+        import epex_optimierung
+        df_epex = daten.get('df_epex', gemeinsam.get('df_epex'))
+        ergebnisse = []
+        for strategie in STRATEGIEN:
+            df_lkw_lastgang, df_lastgang = await loop.run_in_executor(
+                rechen_executor, epex_optimierung.modellierung_epex_daten,
+                szenario, strategie, df_epex, df_lkw, df_anzahl_ladesaeulen
+            )
+            ergebnisse.append((strategie, df_lkw_lastgang, df_lastgang))
+        log(startzeit, f"EPEX-Optimierung fertig: {szenario}")
+        await schreiben(lastgang_speichern, ergebnisse, szenario)
+
+
+async def pipeline(szenarien, stufen=STUFEN, max_vorrat=1, max_schreiben=2):
+    """
+    Führt die Stufen für alle Szenarien aus. stufen ist ein zusammenhängender
+    Ausschnitt aus STUFEN; beginnt er später als 'konfiguration', werden die
+    Zwischenergebnisse der vorherigen Stufen von der Platte gelesen.
+    """
+    if not stufen or list(stufen) != STUFEN[STUFEN.index(stufen[0]):STUFEN.index(stufen[0]) + len(stufen)]:
+        raise ValueError(f"Stufen {stufen} sind kein zusammenhängender Ausschnitt aus {STUFEN}.")
+
+    startzeit = time.time()
+    loop = asyncio.get_running_loop()
+    lese_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline_lesen')
+    schreib_executor = ThreadPoolExecutor(max_workers=max_schreiben, thread_name_prefix='pipeline_schreiben')
+    # Ein Rechen-Thread: Die Stufen parallelisieren intern selbst (Prozesse bzw. Gurobi-Threads)
+    rechen_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline_rechnen')
+
+    warteschlange = asyncio.Queue(maxsize=max_vorrat)
+    schreib_slots = asyncio.Semaphore(max_schreiben)
+    schreib_tasks = []
+
+    async def schreiben(funktion, *args):
+        # Wartet nur, wenn bereits max_schreiben Ergebnisse im Speicher auf die Platte warten
+        await schreib_slots.acquire()
+
+        async def ausfuehren():
+            try:
+                await loop.run_in_executor(schreib_executor, funktion, *args)
+                log(startzeit, f"Geschrieben: {funktion.__name__} {args[-1]}")
+            finally:
+                schreib_slots.release()
+
+        schreib_tasks.append(asyncio.create_task(ausfuehren()))
+
+    try:
+        gemeinsam = await loop.run_in_executor(lese_executor, gemeinsame_eingaben, list(stufen))
+        task_produzent = asyncio.create_task(produzent(szenarien, list(stufen), gemeinsam, warteschlange, lese_executor, startzeit))
+
+        while (eintrag := await warteschlange.get()) is not None:
+            szenario, daten = eintrag
+            log(startzeit, f"Start: {szenario}")
+            await szenario_rechnen(szenario, daten, list(stufen), gemeinsam, schreiben, rechen_executor, startzeit)
+
+        await task_produzent
+        await asyncio.gather(*schreib_tasks)
+
+        if 'epex' in stufen:
+            # Memory-mapped Speicher für die Auswertung, wie in epex_optimierung.main
+            import lastgang_speicher
+            await loop.run_in_executor(schreib_executor, lastgang_speicher.aus_csv, 'epex', list(szenarien))
+            log(startzeit, "Lastgang-Speicher geschrieben: epex")
+    finally:
+        lese_executor.shutdown()
+        schreib_executor.shutdown()
+        rechen_executor.shutdown()
+
+    log(startzeit, f"Pipeline fertig: {len(szenarien)} Szenarien")
+
+
+def main(stufen=STUFEN, max_vorrat=1, max_schreiben=2):
+    asyncio.run(pipeline(config.list_szenarien, stufen, max_vorrat, max_schreiben))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,7 @@
 import pandas as pd
 import numpy as np
 import os
-
-np.random.seed(42)
+import ladekurve
 
 # ======================================================
 # Main Function
@@ -14,6 +13,9 @@ def main():
     """
     Main function to execute the truck simulation pipeline.
     """
+    # Fixed seed for reproducible truck data
+    np.random.seed(42)
+
     # Load configurations and data
     config = load_configurations()
     df_verteilungsfunktion, df_ladevorgaenge_daily = load_input_data(config['path'])
@@ -85,17 +87,6 @@ def get_soc(ankunftszeit):
         soc += np.random.uniform(-0.1, 0.1)
     return soc
 
-def get_leistungsfaktor(soc):
-    """
-    Adjust power factor based on SOC.
-    """
-    if soc <= 1:
-        return 1
-    elif soc < 0.9:
-        return 0.8
-    else:
-        return 0.6 if soc < 1 else 0.2
-
 # ======================================================
 # Truck Data Generation
 # ======================================================
@@ -157,39 +148,31 @@ def generate_truck_data(config, df_verteilungsfunktion, df_ladevorgaenge_daily):
 def assign_charging_stations(df_lkws, config):
     """
     Assign charging stations to each truck based on configurations.
+    Charging times are looked up from the cached charging curve tables (ladekurve).
     """
     df_lkws['Ladesäule'] = None
-    for index in range(len(df_lkws)):
-        kapazitaet = float(df_lkws.loc[index, 'Kapazitaet'])
-        soc_init = df_lkws.loc[index, 'SOC']
-        pausentyp = df_lkws.loc[index, 'Pausentyp']
-        pausenzeit = df_lkws.loc[index, 'Pausenlaenge']
-        soc_target = config['energie_pro_abschnitt'] / kapazitaet + config['sicherheitspuffer']
-
-        if pausentyp == 'Nachtlader':
-            df_lkws.loc[index, 'Ladesäule'] = 'NCS'
-            continue
-        
-        if soc_target < soc_init:
-            raise ValueError("Error: Target SOC is less than initial SOC!")
-
-        ladezeiten = {}
-
-        for station, leistung_init in config['leistung'].items():
-            ladezeit = 0
-            soc = soc_init
-            while soc < soc_target:
-                ladezeit += config['freq']
-                leistungsfaktor = get_leistungsfaktor(soc)
-                aktuelle_leistung = min(leistung_init, leistungsfaktor * config['max_leistung_lkw'])
-                energie = aktuelle_leistung * config['freq'] / 60
-                soc += energie / kapazitaet
-            ladezeiten[station] = pausenzeit - ladezeit
-
-        if ladezeiten['HPC'] >= 0:
-            df_lkws.loc[index, 'Ladesäule'] = 'HPC'
-        elif ladezeiten['MCS'] >= 0:
-            df_lkws.loc[index, 'Ladesäule'] = 'MCS'
+    kapazitaet = df_lkws['Kapazitaet'].astype(float)
+    soc_target = config['energie_pro_abschnitt'] / kapazitaet + config['sicherheitspuffer']
+    nachtlader = df_lkws['Pausentyp'] == 'Nachtlader'
+
+    df_lkws.loc[nachtlader, 'Ladesäule'] = 'NCS'
+
+    if (soc_target[~nachtlader] < df_lkws.loc[~nachtlader, 'SOC']).any():
+        raise ValueError("Error: Target SOC is less than initial SOC!")
+
+    ladezeiten = {}
+
+    for station, leistung_init in config['leistung'].items():
+        ladezeit = pd.Series(0.0, index=df_lkws.index)
+        for kap, index in kapazitaet.groupby(kapazitaet).groups.items():
+            tabelle = ladekurve.ladetabelle(kap, min(leistung_init, config['max_leistung_lkw']), config['freq'])
+            ladezeit[index] = ladekurve.zeit_bis_soc(tabelle, df_lkws.loc[index, 'SOC'], soc_target[index])
+        ladezeiten[station] = df_lkws['Pausenlaenge'] - ladezeit
+
+    hpc = ~nachtlader & (ladezeiten['HPC'] >= 0)
+    mcs = ~nachtlader & ~hpc & (ladezeiten['MCS'] >= 0)
+    df_lkws.loc[hpc, 'Ladesäule'] = 'HPC'
+    df_lkws.loc[mcs, 'Ladesäule'] = 'MCS'
     return df_lkws
 
 # ======================================================